@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Member, Membership
+from .models import Member, Membership, OutboundMessage
 
 admin.site.register(Member)
-admin.site.register(Membership)
\ No newline at end of file
+admin.site.register(Membership)
+admin.site.register(OutboundMessage)
\ No newline at end of file
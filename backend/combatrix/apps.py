@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class CombatrixConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'combatrix'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from . import signals  # noqa: F401
+        from .search import ensure_sqlite_search
+
+        post_migrate.connect(ensure_sqlite_search, sender=self)
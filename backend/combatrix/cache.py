@@ -0,0 +1,19 @@
+from django.core.cache import cache
+from django.db import transaction
+
+
+DASHBOARD_STATS_KEY = 'combatrix:dashboard_stats'
+MEMBER_LIST_STATS_KEY = 'combatrix:member_list_stats'
+
+# Snapshots derived from members and memberships, dropped on any write
+STATS_KEYS = [DASHBOARD_STATS_KEY, MEMBER_LIST_STATS_KEY]
+
+
+def invalidate_dashboard_stats():
+    """
+    Drop the cached dashboard and member list statistics once the current
+    transaction commits
+    """
+    # Deleting before commit would let a concurrent request re-cache the
+    # old figures, so wait until the write is visible
+    transaction.on_commit(lambda: cache.delete_many(STATS_KEYS))
@@ -0,0 +1,80 @@
+import hashlib
+import math
+from datetime import datetime, time
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def collection_version(*querysets):
+    """
+    Cheap version of one or more querysets: the newest ``updated_at`` and
+    the row count of each, one indexed aggregate per queryset. Returns
+    (etag, last_modified).
+
+    Responses also depend on today's date (active flags, expiry windows),
+    so the date is part of the ETag and Last-Modified is never earlier
+    than midnight. Deletes only change the count, so they're caught by
+    If-None-Match but not by If-Modified-Since alone.
+    """
+    today = timezone.localdate()
+    parts = [today.isoformat()]
+    last_modified = timezone.make_aware(datetime.combine(today, time.min))
+
+    for queryset in querysets:
+        version = queryset.order_by().aggregate(latest=Max('updated_at'), count=Count('pk'))
+        parts.append(f'{queryset.model._meta.label}:{version["latest"]}:{version["count"]}')
+        if version['latest'] and version['latest'] > last_modified:
+            last_modified = version['latest']
+
+    etag = quote_etag(hashlib.md5('|'.join(parts).encode()).hexdigest())
+    return etag, last_modified
+
+
+def http_timestamp(last_modified):
+    """
+    ``last_modified`` as whole seconds for Last-Modified and
+    If-Modified-Since, or None while that second is still open.
+
+    HTTP dates have no fractions, so the time is rounded up: truncating
+    it would let a write later in the same second compare as not modified.
+    Rounding up alone still leaves the second itself ambiguous until it
+    has passed, so until then only the ETag is used.
+    """
+    timestamp = math.ceil(last_modified.timestamp())
+    if timestamp > timezone.now().timestamp():
+        return None
+    return timestamp
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified validators for the actions a view wraps with
+    ``conditional_get``. A request whose If-None-Match or If-Modified-Since
+    still matches gets a 304 before anything is queried or serialized.
+    Views say what each action's response depends on with
+    ``get_version_querysets()``.
+    """
+
+    def get_version_querysets(self):
+        raise NotImplementedError
+
+    def conditional_get(self, request, build_response):
+        """Return a 304, or ``build_response()`` with validators attached"""
+        if request.method not in ('GET', 'HEAD'):
+            return build_response()
+
+        etag, last_modified = collection_version(*self.get_version_querysets())
+        timestamp = http_timestamp(last_modified)
+        not_modified = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+        if not_modified is not None:
+            return not_modified
+
+        response = build_response()
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .cache import DASHBOARD_STATS_KEY, MEMBER_LIST_STATS_KEY
+from .lean import membership_rows, membership_values
+from .models import Member, Membership
+
+
+EXPIRING_SOON_DAYS = 15
+MAX_EXPIRING_DAYS = 366
+
+
+def compute_dashboard_stats(today=None):
+    """
+    Build the dashboard figures with a single aggregate over the member
+    rollup columns, including how many members expire soon.
+    """
+    today = today or timezone.now().date()
+
+    member_stats = Member.objects.aggregate(
+        total_members=Count('id'),
+        active_members=Count('id', filter=Q(latest_end_date__gte=today)),
+        expiring_soon_count=Count('id', filter=Q(
+            latest_end_date__gte=today,
+            latest_end_date__lte=today + timedelta(days=EXPIRING_SOON_DAYS),
+        )),
+        total_revenue=Sum('lifetime_revenue'),
+        combatrix_revenue=Sum('lifetime_combatrix_share'),
+        fitshala_revenue=Sum('lifetime_fitshala_share'),
+    )
+
+    return {
+        'total_members': member_stats['total_members'],
+        'active_members': member_stats['active_members'],
+        'total_revenue': member_stats['total_revenue'] or 0,
+        'combatrix_revenue': member_stats['combatrix_revenue'] or 0,
+        'fitshala_revenue': member_stats['fitshala_revenue'] or 0,
+        'expiring_soon_count': member_stats['expiring_soon_count'],
+    }
+
+
+def compute_expiring_soon(today=None):
+    """The latest membership of each member expiring soon, soonest first"""
+    memberships = Membership.objects.expiring_within(EXPIRING_SOON_DAYS, today).order_by('end_date', 'id')
+    return membership_rows(membership_values(memberships))
+
+
+def get_dashboard_stats(include_expiring=True):
+    """
+    Return the dashboard figures from the cache, recomputing them when a
+    write has invalidated the snapshot or the day has rolled over. The
+    embedded ``expiring_soon`` list is only built, and cached, once a
+    caller asks for it; the ``expiring`` endpoint pages the same rows.
+    """
+    today = timezone.now().date()
+    snapshot = cache.get(DASHBOARD_STATS_KEY)
+
+    if snapshot is None or snapshot['date'] != today:
+        snapshot = {'date': today, 'stats': compute_dashboard_stats(today)}
+        cache.set(DASHBOARD_STATS_KEY, snapshot, settings.DASHBOARD_CACHE_TIMEOUT)
+
+    if not include_expiring:
+        return snapshot['stats']
+    if 'expiring_soon' not in snapshot:
+        snapshot['expiring_soon'] = compute_expiring_soon(today)
+        cache.set(DASHBOARD_STATS_KEY, snapshot, settings.DASHBOARD_CACHE_TIMEOUT)
+    return {**snapshot['stats'], 'expiring_soon': snapshot['expiring_soon']}
+
+
+def expiring_buckets(days, today=None):
+    """
+    How many members' latest membership ends on each day of the window,
+    zero days included, from one GROUP BY on the indexed rollup column
+    """
+    today = today or timezone.now().date()
+    counts = dict(
+        Member.objects.expiring_within(days, today)
+        .order_by()
+        .values_list('latest_end_date')
+        .annotate(count=Count('id'))
+    )
+    days = (today + timedelta(days=offset) for offset in range(days + 1))
+    return [{'date': day, 'count': counts.get(day, 0)} for day in days]
+
+
+def compute_member_list_stats(today=None):
+    """Global member counts shown above the member list, in one aggregate"""
+    today = today or timezone.now().date()
+
+    stats = Member.objects.aggregate(
+        total_members=Count('id'),
+        active_members=Count('id', filter=Q(latest_end_date__gte=today)),
+    )
+    stats['inactive_members'] = stats['total_members'] - stats['active_members']
+    return stats
+
+
+def get_member_list_stats():
+    """The member list statistics, cached like the dashboard snapshot"""
+    today = timezone.now().date()
+    snapshot = cache.get(MEMBER_LIST_STATS_KEY)
+
+    if snapshot is None or snapshot['date'] != today:
+        snapshot = {'date': today, 'stats': compute_member_list_stats(today)}
+        cache.set(MEMBER_LIST_STATS_KEY, snapshot, settings.DASHBOARD_CACHE_TIMEOUT)
+
+    return snapshot['stats']
@@ -0,0 +1,68 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import BooleanField, Case, F, Value, When
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+
+EXPORT_FORMATS = ['ndjson', 'csv']
+
+# MembershipSerializer's read fields, in its order, plus the member id
+MEMBERSHIP_EXPORT_FIELDS = [
+    'id', 'is_active', 'member_name', 'start_date', 'end_date',
+    'price', 'combatrix_share', 'fitshala_share', 'created_at', 'updated_at', 'member',
+]
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def membership_export_rows(memberships):
+    """Stream membership rows as plain dicts straight off a server-side cursor"""
+    today = timezone.now().date()
+    rows = memberships.order_by().annotate(
+        member_name=F('member__name'),
+        is_active=Case(
+            When(end_date__gte=today, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+    ).values(
+        'id', 'is_active', 'member_name', 'start_date', 'end_date',
+        'price', 'combatrix_share', 'fitshala_share', 'created_at', 'updated_at', 'member_id',
+    ).order_by('start_date', 'id')
+
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row['member'] = row['member_id']
+        yield {field: row[field] for field in MEMBERSHIP_EXPORT_FIELDS}
+
+
+def stream_export(rows, export_format, filename):
+    """Wrap an iterator of dicts in a constant-memory NDJSON or CSV response"""
+    if export_format == 'csv':
+        writer = csv.DictWriter(_Echo(), fieldnames=MEMBERSHIP_EXPORT_FIELDS)
+
+        def lines():
+            yield writer.writeheader()
+            for row in rows:
+                yield writer.writerow(row)
+
+        content_type = 'text/csv'
+    else:
+        def lines():
+            for row in rows:
+                yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+        content_type = 'application/x-ndjson'
+
+    response = StreamingHttpResponse(lines(), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
@@ -1,6 +1,8 @@
 # forms.py
 from django import forms
-from .models import Member, Membership
+from .dashboard import MAX_EXPIRING_DAYS
+from .models import Member, Membership, validate_membership
+from .search import MAX_LIMIT
 
 class MemberForm(forms.ModelForm):
     class Meta:
@@ -29,19 +31,7 @@ class MembershipForm(forms.ModelForm):
     
     def clean(self):
         cleaned_data = super().clean()
-        start_date = cleaned_data.get('start_date')
-        end_date = cleaned_data.get('end_date')
-        price = cleaned_data.get('price')
-        combatrix_share = cleaned_data.get('combatrix_share')
-        fitshala_share = cleaned_data.get('fitshala_share')
-        
-        if start_date and end_date and start_date > end_date:
-            raise forms.ValidationError("End date cannot be before start date")
-        
-        if price and combatrix_share and fitshala_share:
-            if combatrix_share + fitshala_share != price:
-                raise forms.ValidationError("Combatrix share and Fitshala share must sum up to the total price")
-        
+        validate_membership(cleaned_data)
         return cleaned_data
 
 
@@ -63,4 +53,14 @@ class DateRangeForm(forms.Form):
         if start_date and end_date and start_date > end_date:
             raise forms.ValidationError("End date cannot be before start date")
         
-        return cleaned_data
\ No newline at end of file
+        return cleaned_data
+
+
+class MemberSearchForm(forms.Form):
+    q = forms.CharField(max_length=100)
+    limit = forms.IntegerField(min_value=1, max_value=MAX_LIMIT, required=False)
+    status = forms.ChoiceField(choices=Member.STATUS_CHOICES, required=False)
+
+
+class ExpiringForm(forms.Form):
+    days = forms.IntegerField(min_value=0, max_value=MAX_EXPIRING_DAYS, required=False)
@@ -0,0 +1,108 @@
+"""
+Plain-dict read path for the list endpoints.
+
+Rows come straight from ``values()`` and are turned into the same JSON
+shape MemberListSerializer and MembershipSerializer produce, without the
+per-row, per-field serializer machinery. Pair with FastJSONRenderer.
+"""
+from django.utils import timezone
+
+
+# MemberListSerializer.Meta.fields, in order
+MEMBER_LIST_FIELDS = [
+    'id', 'name', 'email', 'phone_number',
+    'date_joined', 'status', 'is_active',
+    'membership_end_date', 'total_revenue',
+]
+MEMBER_LIST_COLUMNS = [
+    'id', 'name', 'email', 'phone_number', 'date_joined', 'status',
+    'latest_end_date', 'lifetime_revenue',
+]
+
+# MembershipSerializer's readable fields, in order
+MEMBERSHIP_FIELDS = [
+    'id', 'is_active', 'member_name', 'start_date', 'end_date',
+    'price', 'combatrix_share', 'fitshala_share', 'created_at', 'updated_at',
+]
+MEMBERSHIP_COLUMNS = [
+    'id', 'start_date', 'end_date', 'price', 'combatrix_share', 'fitshala_share',
+    'created_at', 'updated_at',
+]
+
+
+def _datetime(value, tz):
+    # Same output as serializers.DateTimeField with the default ISO format
+    if value is None:
+        return None
+    value = value.astimezone(tz).isoformat() if value.tzinfo is not None else value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _decimal(value):
+    # serializers.DecimalField renders fixed-point strings
+    return None if value is None else format(value, 'f')
+
+
+def requested_fields(request, available):
+    """The ``?fields=`` subset of ``available``, in serializer order"""
+    value = request.query_params.get('fields', '') if request is not None else ''
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    if not requested:
+        return available
+    return [name for name in available if name in requested]
+
+
+def member_list_values(queryset):
+    return queryset.values(*MEMBER_LIST_COLUMNS)
+
+
+def member_list_rows(rows, fields=MEMBER_LIST_FIELDS):
+    """MemberListSerializer output for rows from member_list_values()"""
+    today = timezone.now().date()
+    data = []
+    for row in rows:
+        end_date = row['latest_end_date']
+        date_joined = row['date_joined']
+        item = {
+            'id': row['id'],
+            'name': row['name'],
+            'email': row['email'],
+            'phone_number': row['phone_number'],
+            'date_joined': date_joined.isoformat() if date_joined is not None else None,
+            'status': row['status'],
+            'is_active': end_date is not None and end_date >= today,
+            'membership_end_date': end_date,
+            'total_revenue': row['lifetime_revenue'],
+        }
+        data.append(item if fields is MEMBER_LIST_FIELDS else {name: item[name] for name in fields})
+    return data
+
+
+def membership_values(queryset, fields=MEMBERSHIP_FIELDS):
+    # The member join is only needed for member_name
+    columns = MEMBERSHIP_COLUMNS + (['member__name'] if 'member_name' in fields else [])
+    return queryset.values(*columns)
+
+
+def membership_rows(rows, fields=MEMBERSHIP_FIELDS):
+    """MembershipSerializer output for rows from membership_values()"""
+    today = timezone.now().date()
+    tz = timezone.get_current_timezone()
+    data = []
+    for row in rows:
+        item = {
+            'id': row['id'],
+            'is_active': row['end_date'] >= today,
+            'member_name': row.get('member__name'),
+            'start_date': row['start_date'].isoformat(),
+            'end_date': row['end_date'].isoformat(),
+            'price': _decimal(row['price']),
+            'combatrix_share': _decimal(row['combatrix_share']),
+            'fitshala_share': _decimal(row['fitshala_share']),
+            'created_at': _datetime(row['created_at'], tz),
+            'updated_at': _datetime(row['updated_at'], tz),
+        }
+        data.append(item if fields is MEMBERSHIP_FIELDS else {name: item[name] for name in fields})
+    return data
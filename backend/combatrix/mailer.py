@@ -0,0 +1,215 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from django.core.mail import get_connection
+from django.core.management.base import CommandError
+
+
+class RateLimiter:
+    """Spaces sends at most ``rate`` per second across every worker thread"""
+
+    def __init__(self, rate=None, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / rate if rate else 0
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = self.clock()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            self.sleep(slot - now)
+
+
+class ProgressFile:
+    """
+    Append-only list of recipients already mailed, one per line, so a run
+    that crashed can be restarted without mailing them again
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.done = set()
+        self.file = None
+        if path:
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    self.done = {line.strip() for line in f if line.strip()}
+            self.file = open(path, 'a', encoding='utf-8')
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def mark(self, key):
+        with self.lock:
+            self.done.add(key)
+            if self.file:
+                self.file.write(key + '\n')
+                self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+
+class CampaignResult:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sent = 0
+        self.skipped = 0
+        self.failed = []
+
+    def add_sent(self):
+        with self.lock:
+            self.sent += 1
+
+    def add_failed(self, recipient, error):
+        with self.lock:
+            self.failed.append((recipient, error))
+
+
+class CampaignMailer:
+    """
+    Send a stream of EmailMessages in batches, one mail connection per
+    batch, optionally across a small thread pool.
+
+    Each message is keyed by its first recipient. Failed sends are retried
+    with exponential backoff on a fresh connection; recipients are written
+    to the progress file as soon as their message is accepted, and skipped
+    on the next run. Works with any EMAIL_BACKEND, so the locmem and
+    filebased backends can stand in for SMTP.
+    """
+
+    def __init__(self, batch_size=50, workers=1, rate=None, retries=3, backoff=1.0,
+                 progress_path=None, connection_factory=get_connection, sleep=time.sleep):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.progress_path = progress_path
+        self.connection_factory = connection_factory
+        self.sleep = sleep
+        self.rate_limiter = RateLimiter(rate, sleep=sleep)
+
+    def send(self, messages):
+        """Send every message not already in the progress file; returns a CampaignResult"""
+        result = CampaignResult()
+        progress = ProgressFile(self.progress_path)
+
+        def pending():
+            for message in messages:
+                if message.to[0] in progress:
+                    result.skipped += 1
+                    continue
+                yield message
+
+        messages_left = pending()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                # Keep only a couple of batches per worker in flight so a
+                # large recipient list is never held in memory at once
+                in_flight = set()
+                for batch in iter(lambda: list(islice(messages_left, self.batch_size)), []):
+                    if len(in_flight) >= self.workers * 2:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    in_flight.add(pool.submit(self.send_batch, batch, progress, result))
+                for future in in_flight:
+                    future.result()
+        finally:
+            progress.close()
+
+        return result
+
+    def send_batch(self, batch, progress, result):
+        """Send one batch over a single connection, reopening it after a failure"""
+        connection = None
+        try:
+            for message in batch:
+                recipient = message.to[0]
+                for attempt in range(self.retries + 1):
+                    try:
+                        if connection is None:
+                            connection = self.connection_factory(fail_silently=False)
+                            connection.open()
+                        self.rate_limiter.wait()
+                        connection.send_messages([message])
+                    except Exception as e:
+                        if connection is not None:
+                            try:
+                                connection.close()
+                            except Exception:
+                                pass
+                            connection = None
+                        if attempt == self.retries:
+                            result.add_failed(recipient, str(e))
+                        else:
+                            self.sleep(self.backoff * 2 ** attempt)
+                    else:
+                        progress.mark(recipient)
+                        result.add_sent()
+                        break
+        finally:
+            if connection is not None:
+                connection.close()
+
+
+# Options add_mailer_arguments() defines, for commands passing them on
+MAILER_OPTIONS = ['batch_size', 'workers', 'rate', 'retries', 'progress_file']
+
+
+def add_mailer_arguments(parser):
+    """Command-line options shared by the campaign commands"""
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=50,
+        help='Emails sent over each mail connection (default: 50)',
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Batches sent in parallel (default: 1)',
+    )
+    parser.add_argument(
+        '--rate',
+        type=float,
+        help='Maximum emails per second across all workers (default: no limit)',
+    )
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=3,
+        help='Retries for each failed email, with exponential backoff (default: 3)',
+    )
+    parser.add_argument(
+        '--progress-file',
+        type=str,
+        help='Record mailed recipients here and skip them when the run is repeated',
+    )
+
+
+def mailer_from_options(options):
+    for option in ('batch_size', 'workers'):
+        if options[option] < 1:
+            raise CommandError(f'--{option.replace("_", "-")} must be a positive integer')
+    if options['retries'] < 0:
+        raise CommandError('--retries cannot be negative')
+    return CampaignMailer(
+        batch_size=options['batch_size'],
+        workers=options['workers'],
+        rate=options['rate'],
+        retries=options['retries'],
+        progress_path=options['progress_file'],
+    )
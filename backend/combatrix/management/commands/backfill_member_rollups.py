@@ -0,0 +1,103 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from combatrix.models import Member
+
+
+# (rollup column, live annotation from with_membership_summary)
+ROLLUP_CHECKS = [
+    ('latest_end_date', 'summary_end_date'),
+    ('lifetime_revenue', 'summary_total_revenue'),
+    ('lifetime_combatrix_share', 'summary_combatrix_share'),
+    ('lifetime_fitshala_share', 'summary_fitshala_share'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Backfill and verify the membership rollup columns stored on members'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of members recomputed per UPDATE (default: 1000)',
+        )
+        parser.add_argument(
+            '--verify-only',
+            action='store_true',
+            help='Only compare the stored rollups with the memberships, without writing',
+        )
+        parser.add_argument(
+            '--verbose',
+            action='store_true',
+            help='Show every member whose rollups do not match',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        verify_only = options['verify_only']
+        verbose = options['verbose']
+
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be a positive integer')
+
+        self.stdout.write(
+            self.style.SUCCESS('Verifying member rollups...' if verify_only else 'Backfilling member rollups...')
+        )
+
+        processed = 0
+        updated = 0
+        mismatched = 0
+
+        for chunk in self.member_id_chunks(chunk_size):
+            if not verify_only:
+                with transaction.atomic():
+                    updated += Member.objects.filter(pk__in=chunk).refresh_rollups()
+
+            for member_id, name, differences in self.find_mismatches(chunk):
+                mismatched += 1
+                if verbose:
+                    self.stdout.write(self.style.WARNING(f'Mismatch: {name} (ID {member_id}) {differences}'))
+
+            processed += len(chunk)
+            self.stdout.write(f'  {processed} members checked')
+
+        self.stdout.write(self.style.SUCCESS('\n=== ROLLUP SUMMARY ==='))
+        self.stdout.write(f'Members processed: {processed}')
+        if not verify_only:
+            self.stdout.write(f'Members updated: {updated}')
+        self.stdout.write(f'Mismatched rollups: {mismatched}')
+
+        if mismatched and verify_only:
+            raise CommandError(f'{mismatched} members have stale rollups; run without --verify-only to fix them')
+        if mismatched:
+            # Only possible if memberships changed while the chunk was being verified
+            self.stdout.write(self.style.WARNING('Some rollups changed during the run; re-run to verify them'))
+
+    def member_id_chunks(self, chunk_size):
+        """Yield member ids in ascending chunks using keyset pagination"""
+        last_id = 0
+        while True:
+            chunk = list(
+                Member.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1]
+
+    def find_mismatches(self, member_ids):
+        """Compare stored rollups with live aggregates for one chunk of members"""
+        fields = ['pk', 'name'] + [field for pair in ROLLUP_CHECKS for field in pair]
+        rows = Member.objects.filter(pk__in=member_ids).with_membership_summary().values(*fields)
+
+        for row in rows:
+            differences = {
+                stored: (row[stored], row[live])
+                for stored, live in ROLLUP_CHECKS
+                if row[stored] != row[live]
+            }
+            if differences:
+                yield row['pk'], row['name'], differences
@@ -0,0 +1,129 @@
+import json
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from combatrix.lean import member_list_rows, member_list_values, membership_rows, membership_values
+from combatrix.models import Member, Membership
+from combatrix.renderers import FastJSONRenderer, orjson
+from combatrix.serializers import MemberListSerializer, MembershipSerializer
+
+
+BENCH_EMAIL_DOMAIN = 'bench.invalid'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the serializer and values() read paths of the list endpoints on synthetic rows. '
+        'Runs inside a transaction that is rolled back, so the database is left untouched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=str,
+            default='1000,10000,100000',
+            help='Comma-separated row counts to benchmark (default: 1000,10000,100000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per measurement; the fastest is reported (default: 3)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted({int(size) for size in options['sizes'].split(',') if size.strip()})
+        except ValueError:
+            raise CommandError('--sizes expects comma-separated integers')
+        if not sizes or sizes[0] < 1:
+            raise CommandError('--sizes must be positive integers')
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be a positive integer')
+
+        self.repeat = options['repeat']
+        self.stdout.write(self.style.SUCCESS('Benchmarking list read paths...'))
+        self.stdout.write(f'JSON renderer: {"orjson" if orjson else "stdlib json (orjson not installed)"}')
+        self.stdout.write(
+            f'\n{"Rows":>8}  {"Workload":<28}{"Serializer":>12}{"values()":>12}{"Speedup":>9}'
+        )
+
+        with transaction.atomic():
+            created = 0
+            for size in sizes:
+                self.create_rows(created, size)
+                created = size
+                self.run_size(size)
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('\nBenchmark completed; synthetic rows rolled back.'))
+
+    def create_rows(self, start, stop):
+        """Top the synthetic data up to ``stop`` members with one membership each"""
+        today = date.today()
+        members = Member.objects.bulk_create(
+            Member(
+                name=f'Bench Member {i}',
+                email=f'member{i}@{BENCH_EMAIL_DOMAIN}',
+                phone_number=f'9{i:09d}'[-10:],
+                emergency_contact_name='Bench Contact',
+                emergency_contact_number='9000000000',
+                date_joined=today - timedelta(days=i % 1000),
+            )
+            for i in range(start, stop)
+        )
+        Membership.objects.bulk_create(
+            Membership(
+                member=member,
+                start_date=today - timedelta(days=i % 365),
+                end_date=today - timedelta(days=i % 365) + timedelta(days=90),
+                price=Decimal('5000.00'),
+                combatrix_share=Decimal('3500.00'),
+                fitshala_share=Decimal('1500.00'),
+            )
+            for i, member in enumerate(members, start=start)
+        )
+
+    def run_size(self, size):
+        members = Member.objects.filter(email__endswith=f'@{BENCH_EMAIL_DOMAIN}').order_by('id')
+        memberships = Membership.objects.filter(
+            member__email__endswith=f'@{BENCH_EMAIL_DOMAIN}'
+        ).order_by('start_date', 'id')
+
+        workloads = [
+            (
+                'members list',
+                lambda: JSONRenderer().render(MemberListSerializer(members, many=True).data),
+                lambda: FastJSONRenderer().render(member_list_rows(member_list_values(members))),
+            ),
+            (
+                'memberships list / revenue',
+                lambda: JSONRenderer().render(
+                    MembershipSerializer(memberships.select_related('member'), many=True).data
+                ),
+                lambda: FastJSONRenderer().render(membership_rows(membership_values(memberships))),
+            ),
+        ]
+
+        for name, serializer_path, lean_path in workloads:
+            serializer_time, expected = self.measure(serializer_path)
+            lean_time, actual = self.measure(lean_path)
+            if json.loads(expected) != json.loads(actual):
+                raise CommandError(f'{name}: the values() path output differs from the serializer output')
+            self.stdout.write(
+                f'{size:>8}  {name:<28}{serializer_time * 1000:>10.0f}ms{lean_time * 1000:>10.0f}ms'
+                f'{serializer_time / lean_time:>8.1f}x'
+            )
+
+    def measure(self, build):
+        best = None
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            body = build()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, body
@@ -0,0 +1,214 @@
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from combatrix.models import Member, Membership
+from combatrix.seeding import MembershipHistoryGenerator
+
+
+# Most queries each workload may run, whatever the number of rows. Every
+# endpoint and command here is meant to be O(1) in queries; a loop that
+# queries per member or per membership blows through these at 1k rows.
+# Savepoints count, so a new atomic() block shows up here too.
+QUERY_BUDGETS = {
+    'members list': 4,
+    'members list (cursor)': 2,
+    'member retrieve': 4,
+    'member search': 2,
+    'dashboard_stats': 4,
+    'memberships expiring': 4,
+    'revenue_analysis': 5,
+    'update_member_status': 7,
+    'generate_monthly_report': 8,
+}
+
+BENCH_EMAIL_DOMAIN = 'bench.invalid'
+
+TRANSACTION_STATEMENTS = {'BEGIN', 'COMMIT', 'ROLLBACK'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the API endpoints and reporting commands on synthetic data at several scales, '
+        'recording query counts and peak Python memory, and fail when a query budget is exceeded. '
+        'Runs in a throwaway SQLite test database, so nothing else is touched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=str,
+            default='1000,10000,100000',
+            help='Comma-separated member counts to benchmark (default: 1000,10000,100000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Timed runs per workload; the fastest is reported (default: 3)',
+        )
+        parser.add_argument(
+            '--workloads',
+            type=str,
+            help=f'Comma-separated subset of: {", ".join(QUERY_BUDGETS)} (default: all)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for the synthetic data (default: 0)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted({int(size) for size in options['sizes'].split(',') if size.strip()})
+        except ValueError:
+            raise CommandError('--sizes expects comma-separated integers')
+        if not sizes or sizes[0] < 1:
+            raise CommandError('--sizes must be positive integers')
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be a positive integer')
+
+        workloads = list(QUERY_BUDGETS)
+        if options['workloads']:
+            workloads = [name.strip() for name in options['workloads'].split(',') if name.strip()]
+            unknown = set(workloads) - set(QUERY_BUDGETS)
+            if unknown:
+                raise CommandError(f'Unknown workloads: {", ".join(sorted(unknown))}')
+
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'The benchmark suite runs on SQLite, e.g. '
+                'DATABASE_URL=sqlite:////tmp/combatrix.db python manage.py benchmark_suite'
+            )
+
+        self.repeat = options['repeat']
+        self.today = date.today()
+        generator = MembershipHistoryGenerator(
+            seed=options['seed'], as_of=self.today, email_domain=BENCH_EMAIL_DOMAIN
+        )
+
+        # A fresh in-memory test database, like the test runner uses
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        self.stdout.write(self.style.SUCCESS('Benchmarking endpoints and commands...'))
+        self.stdout.write(
+            f'\n{"Members":>8} {"Memberships":>12}  {"Workload":<26}{"Time":>10}'
+            f'{"Queries":>9}{"Budget":>8}{"Peak mem":>11}'
+        )
+
+        over_budget = []
+        try:
+            self.client = APIClient()
+            self.client.force_authenticate(
+                User.objects.create_superuser('bench', f'bench@{BENCH_EMAIL_DOMAIN}', None)
+            )
+            with tempfile.TemporaryDirectory() as output_dir:
+                self.output_dir = output_dir
+                created = 0
+                for size in sizes:
+                    # Top the synthetic data up to this size
+                    generator.create(created, size)
+                    created = size
+                    over_budget += self.run_size(size, workloads)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if over_budget:
+            raise CommandError('Query budget exceeded: ' + '; '.join(
+                f'{name} at {size} members ran {queries} queries (budget {QUERY_BUDGETS[name]})'
+                for size, name, queries in over_budget
+            ))
+        self.stdout.write(self.style.SUCCESS('\nBenchmark completed; every workload is within its query budget.'))
+
+    def run_size(self, size, workloads):
+        membership_count = Membership.objects.count()
+        sample = Member.objects.order_by('id')[size // 2]
+        year_ago = self.today - timedelta(days=365)
+        workload_calls = {
+            'members list': lambda: self.get('/api/members/'),
+            'members list (cursor)': lambda: self.get('/api/members/?pagination=cursor&statistics=false'),
+            'member retrieve': lambda: self.get(f'/api/members/{sample.pk}/'),
+            'member search': lambda: self.get('/api/members/search/?q=shar'),
+            'dashboard_stats': lambda: self.get('/api/members/dashboard_stats/'),
+            'memberships expiring': lambda: self.get('/api/memberships/expiring/?days=30'),
+            'revenue_analysis': lambda: self.response_body(self.client.post(
+                '/api/memberships/revenue_analysis/',
+                {'start_date': year_ago.isoformat(), 'end_date': self.today.isoformat()},
+                format='json',
+            )),
+            # One chunk, so the count doesn't grow with the deliberate
+            # per-chunk UPDATEs
+            'update_member_status': lambda: call_command(
+                'update_member_status', '--chunk-size', str(size), stdout=StringIO()
+            ),
+            'generate_monthly_report': lambda: call_command(
+                'generate_monthly_report',
+                '--streaming', '--output-dir', self.output_dir, '--filename', 'bench',
+                stdout=StringIO(),
+            ),
+        }
+
+        over_budget = []
+        for name in workloads:
+            # Timed runs first, so lazy imports and warm-up allocations
+            # don't count towards the peak
+            elapsed = min(self.timed_run(workload_calls[name]) for _ in range(self.repeat))
+            queries, peak = self.instrumented_run(workload_calls[name])
+            budget = QUERY_BUDGETS[name]
+            flag = ''
+            if queries > budget:
+                over_budget.append((size, name, queries))
+                flag = self.style.ERROR('  over budget')
+            self.stdout.write(
+                f'{size:>8} {membership_count:>12}  {name:<26}{elapsed * 1000:>8.1f}ms'
+                f'{queries:>9}{budget:>8}{peak / 2 ** 20:>9.1f}MB{flag}'
+            )
+        return over_budget
+
+    def get(self, url):
+        return self.response_body(self.client.get(url))
+
+    def response_body(self, response):
+        if response.status_code != 200:
+            raise CommandError(f'{response.wsgi_request.path} answered {response.status_code}')
+        # Streamed exports and regular responses alike
+        return b''.join(response) if response.streaming else response.content
+
+    def run_once(self, workload):
+        """
+        Run once from a cold cache, in a transaction that is rolled back so
+        every run (update_member_status included) sees the same rows
+        """
+        cache.clear()
+        with transaction.atomic():
+            workload()
+            transaction.set_rollback(True)
+
+    def instrumented_run(self, workload):
+        """Query count and peak traced Python memory of one run"""
+        reset_queries()
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                self.run_once(workload)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # run_once()'s own BEGIN/ROLLBACK aren't the workload's
+        statements = [query for query in queries if query['sql'] not in TRANSACTION_STATEMENTS]
+        return len(statements), peak
+
+    def timed_run(self, workload):
+        started = time.perf_counter()
+        self.run_once(workload)
+        return time.perf_counter() - started
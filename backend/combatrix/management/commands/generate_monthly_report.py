@@ -1,12 +1,56 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from collections import defaultdict
+from itertools import groupby, zip_longest
+from operator import itemgetter
 import pandas as pd
 from decimal import Decimal
+import hashlib
+import json
 import os
+import shutil
 
-from combatrix.models import Member, Membership  # Replace 'your_app' with your actual app name
+from django.db import connection
+from django.db.models import BooleanField, Case, CharField, Count, F, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import Cast, Concat, Length, TruncMonth
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+from combatrix.models import Member, Membership, MonthlyRevenue, next_month  # Replace 'your_app' with your actual app name
+
+
+DETAILED_COLUMNS = [
+    'Member Name', 'Member Email', 'Member Status', 'Member Join Date',
+    'Membership Start', 'Membership End', 'Duration (Days)', 'Month',
+    'Price', 'Combatrix Share', 'Fitshala Share', 'Is Currently Active', 'Created At',
+]
+
+# Columns read from the database for each detailed row, in sheet order
+DETAILED_SOURCE_FIELDS = [
+    'member__name', 'member__email', 'member__status', 'member__date_joined',
+    'start_date', 'end_date', 'price', 'combatrix_share', 'fitshala_share',
+    'member_is_active', 'created_at',
+]
+
+# Month partitions of the parquet/csv output: (source field, column name)
+PARTITION_FIELDS = [
+    ('id', 'membership_id'),
+    ('member_id', 'member_id'),
+    ('member__name', 'member_name'),
+    ('member__email', 'member_email'),
+    ('member__status', 'member_status'),
+    ('member__date_joined', 'member_date_joined'),
+    ('start_date', 'start_date'),
+    ('end_date', 'end_date'),
+    ('price', 'price'),
+    ('combatrix_share', 'combatrix_share'),
+    ('fitshala_share', 'fitshala_share'),
+    ('created_at', 'created_at'),
+]
+PARTITION_SOURCE_FIELDS = [source for source, _ in PARTITION_FIELDS]
+PARTITION_MEMBER_FIELDS = [source for source in PARTITION_SOURCE_FIELDS if source.startswith('member__')]
+PARTITION_COLUMNS = [column for _, column in PARTITION_FIELDS]
 
 
 class Command(BaseCommand):
@@ -41,6 +85,23 @@ class Command(BaseCommand):
             default='all',
             help='Filter members by status (default: all)',
         )
+        parser.add_argument(
+            '--streaming',
+            action='store_true',
+            help='Write the Excel file row by row in bounded memory (for very large histories)',
+        )
+        parser.add_argument(
+            '--format',
+            type=str,
+            choices=['xlsx', 'parquet', 'csv'],
+            default='xlsx',
+            help='Output format; parquet and csv write one partition per month (default: xlsx)',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='With parquet/csv, only rewrite months whose memberships changed since the last run',
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(
@@ -61,10 +122,15 @@ class Command(BaseCommand):
             # Generate reports
             monthly_data = self.generate_monthly_report(start_date, end_date, options['status'])
             summary_df = self.create_excel_report(monthly_data)
-            detailed_df = self.generate_detailed_membership_report(start_date, end_date, options['status'])
 
             # Save Excel file
-            filename = self.save_excel_report(summary_df, detailed_df, options)
+            if options['format'] != 'xlsx':
+                filename = self.save_partitioned_report(summary_df, start_date, end_date, options)
+            elif options['streaming']:
+                filename = self.save_excel_report_streaming(summary_df, start_date, end_date, options)
+            else:
+                detailed_df = self.generate_detailed_membership_report(start_date, end_date, options['status'])
+                filename = self.save_excel_report(summary_df, detailed_df, options)
             
             # Print summary
             self.print_summary_statistics(start_date, end_date, options['status'])
@@ -78,7 +144,11 @@ class Command(BaseCommand):
 
     def generate_monthly_report(self, start_date=None, end_date=None, status_filter='all'):
         """
-        Generate month-wise report for member registrations and memberships
+        Generate month-wise report for member registrations and memberships.
+
+        Counts and sums come from the MonthlyRevenue rollup or TruncMonth
+        group-by queries, so the work done here grows with the number of
+        months, not rows.
         """
         
         # Dictionary to store monthly data
@@ -88,58 +158,110 @@ class Command(BaseCommand):
             'total_revenue': Decimal('0.00'),
             'combatrix_share': Decimal('0.00'),
             'fitshala_share': Decimal('0.00'),
-            'member_names': [],
-            'membership_details': []
+            'member_names': '',
+            'membership_details': ''
         })
         
-        # Get filtered members
-        members_qs = Member.objects.all()
+        members_qs, memberships_qs = self.get_filtered_querysets(start_date, end_date, status_filter)
         
-        if status_filter != 'all':
-            members_qs = members_qs.filter(status=status_filter)
-            
-        if start_date:
-            members_qs = members_qs.filter(date_joined__gte=start_date)
-            
-        if end_date:
-            members_qs = members_qs.filter(date_joined__lte=end_date)
+        # Member registrations per month
+        member_months = members_qs.annotate(
+            month=TruncMonth('date_joined')
+        ).values('month').annotate(
+            new_members=Count('id')
+        ).order_by()
         
-        # Process member registrations
-        for member in members_qs:
-            reg_month_key = member.date_joined.strftime('%Y-%m')
-            month_name = member.date_joined.strftime('%B %Y')
-            
-            monthly_data[reg_month_key]['new_members'] += 1
-            monthly_data[reg_month_key]['member_names'].append(member.name)
-            monthly_data[reg_month_key]['month_name'] = month_name
+        for row in member_months:
+            data = monthly_data[row['month'].strftime('%Y-%m')]
+            data['new_members'] = row['new_members']
+            data['month_name'] = row['month'].strftime('%B %Y')
+        
+        # Memberships and revenue per month. Without a status filter these
+        # come from the MonthlyRevenue rollup; member status isn't part of
+        # it, so filtered reports group the memberships directly.
+        if status_filter == 'all':
+            membership_months = MonthlyRevenue.objects.breakdown(start_date, end_date)
+        else:
+            membership_months = memberships_qs.annotate(
+                month=TruncMonth('start_date')
+            ).values('month').annotate(
+                count=Count('id'),
+                revenue=Sum('price'),
+                combatrix=Sum('combatrix_share'),
+                fitshala=Sum('fitshala_share')
+            ).order_by()
+        
+        for row in membership_months:
+            data = monthly_data[row['month'].strftime('%Y-%m')]
+            data['new_memberships'] = row['count']
+            data['total_revenue'] = row['revenue'] or Decimal('0.00')
+            data['combatrix_share'] = row['combatrix'] or Decimal('0.00')
+            data['fitshala_share'] = row['fitshala'] or Decimal('0.00')
+            data['month_name'] = row['month'].strftime('%B %Y')
+        
+        # Name and detail lists per month
+        month_lists = [
+            ('member_names', members_qs, 'date_joined', ['name'], '{}'),
+            ('membership_details', memberships_qs, 'start_date', ['member__name', 'price'], '{} (${})'),
+        ]
         
-        # Get filtered memberships
-        memberships_qs = Membership.objects.select_related('member')
+        for key, queryset, date_field, fields, template in month_lists:
+            for month, joined in self.month_string_lists(queryset, date_field, fields, template):
+                monthly_data[month.strftime('%Y-%m')][key] = joined
+        
+        return monthly_data
+
+    def get_filtered_querysets(self, start_date=None, end_date=None, status_filter='all'):
+        """
+        Members filtered on join date and memberships filtered on start
+        date, both restricted to the requested member status
+        """
+        members_qs = Member.objects.all()
+        memberships_qs = Membership.objects.all()
         
         if status_filter != 'all':
+            members_qs = members_qs.filter(status=status_filter)
             memberships_qs = memberships_qs.filter(member__status=status_filter)
             
         if start_date:
+            members_qs = members_qs.filter(date_joined__gte=start_date)
             memberships_qs = memberships_qs.filter(start_date__gte=start_date)
             
         if end_date:
+            members_qs = members_qs.filter(date_joined__lte=end_date)
             memberships_qs = memberships_qs.filter(start_date__lte=end_date)
         
-        # Process memberships
-        for membership in memberships_qs:
-            membership_month_key = membership.start_date.strftime('%Y-%m')
-            month_name = membership.start_date.strftime('%B %Y')
+        return members_qs, memberships_qs
+
+    def month_string_lists(self, queryset, date_field, fields, template):
+        """
+        Yield (month, comma-separated labels) pairs, ordered by id within
+        each month, where each label is ``template`` filled with ``fields``.
+        PostgreSQL builds the strings with StringAgg; other databases
+        stream just the label fields and join them here.
+        """
+        queryset = queryset.annotate(month=TruncMonth(date_field))
+        
+        if connection.vendor == 'postgresql':
+            from django.contrib.postgres.aggregates import StringAgg
             
-            monthly_data[membership_month_key]['new_memberships'] += 1
-            monthly_data[membership_month_key]['total_revenue'] += membership.price
-            monthly_data[membership_month_key]['combatrix_share'] += membership.combatrix_share
-            monthly_data[membership_month_key]['fitshala_share'] += membership.fitshala_share
-            monthly_data[membership_month_key]['month_name'] = month_name
+            parts = []
+            for literal, field in zip_longest(template.split('{}'), fields):
+                if literal:
+                    parts.append(Value(literal))
+                if field:
+                    parts.append(Cast(field, CharField()))
+            label = Concat(*parts, output_field=CharField()) if len(parts) > 1 else parts[0]
             
-            membership_detail = f"{membership.member.name} (${membership.price})"
-            monthly_data[membership_month_key]['membership_details'].append(membership_detail)
+            rows = queryset.values('month').annotate(
+                joined=StringAgg(label, delimiter=', ', ordering='id')
+            ).order_by().values_list('month', 'joined')
+            yield from rows
+            return
         
-        return monthly_data
+        rows = queryset.order_by('month', 'id').values_list('month', *fields)
+        for month, group in groupby(rows.iterator(), key=itemgetter(0)):
+            yield month, ', '.join(template.format(*row[1:]) for row in group)
 
     def create_excel_report(self, monthly_data):
         """
@@ -159,8 +281,8 @@ class Command(BaseCommand):
                 'Total Revenue': float(data['total_revenue']),
                 'Combatrix Share': float(data['combatrix_share']),
                 'Fitshala Share': float(data['fitshala_share']),
-                'Member Names': ', '.join(data['member_names']) if data['member_names'] else 'None',
-                'Membership Details': ', '.join(data['membership_details']) if data['membership_details'] else 'None'
+                'Member Names': data['member_names'] or 'None',
+                'Membership Details': data['membership_details'] or 'None'
             }
             
             report_data.append(row)
@@ -187,61 +309,61 @@ class Command(BaseCommand):
 
     def generate_detailed_membership_report(self, start_date=None, end_date=None, status_filter='all'):
         """
-        Generate detailed membership report with individual membership records
+        Generate detailed membership report with individual membership records.
+
+        One values_list() query feeds the DataFrame column by column; dates,
+        durations, month labels and amounts are converted as whole columns.
         """
         
-        memberships_qs = Membership.objects.select_related('member').order_by('start_date')
+        memberships_qs = self.get_filtered_querysets(start_date, end_date, status_filter)[1]
+        rows = list(self.detailed_membership_values(memberships_qs))
         
-        if status_filter != 'all':
-            memberships_qs = memberships_qs.filter(member__status=status_filter)
-            
-        if start_date:
-            memberships_qs = memberships_qs.filter(start_date__gte=start_date)
-            
-        if end_date:
-            memberships_qs = memberships_qs.filter(start_date__lte=end_date)
+        if not rows:
+            return pd.DataFrame()
         
-        detailed_data = []
+        columns = dict(zip(DETAILED_SOURCE_FIELDS, zip(*rows)))
+        start = pd.to_datetime(pd.Series(columns['start_date']))
+        end = pd.to_datetime(pd.Series(columns['end_date']))
+        status_labels = dict(Member.STATUS_CHOICES)
         
-        for membership in memberships_qs:
-            row = {
-                'Member Name': membership.member.name,
-                'Member Email': membership.member.email,
-                'Member Status': membership.member.get_status_display(),
-                'Member Join Date': membership.member.date_joined.strftime('%Y-%m-%d'),
-                'Membership Start': membership.start_date.strftime('%Y-%m-%d'),
-                'Membership End': membership.end_date.strftime('%Y-%m-%d'),
-                'Duration (Days)': (membership.end_date - membership.start_date).days + 1,
-                'Month': membership.start_date.strftime('%B %Y'),
-                'Price': float(membership.price),
-                'Combatrix Share': float(membership.combatrix_share),
-                'Fitshala Share': float(membership.fitshala_share),
-                'Is Currently Active': membership.member.is_active(),
-                'Created At': membership.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
-            detailed_data.append(row)
+        return pd.DataFrame({
+            'Member Name': columns['member__name'],
+            'Member Email': columns['member__email'],
+            'Member Status': pd.Series(columns['member__status']).map(lambda value: status_labels.get(value, value)),
+            'Member Join Date': pd.to_datetime(pd.Series(columns['member__date_joined'])).dt.strftime('%Y-%m-%d'),
+            'Membership Start': start.dt.strftime('%Y-%m-%d'),
+            'Membership End': end.dt.strftime('%Y-%m-%d'),
+            'Duration (Days)': (end - start).dt.days + 1,
+            'Month': start.dt.strftime('%B %Y'),
+            'Price': pd.Series(columns['price']).astype(float),
+            'Combatrix Share': pd.Series(columns['combatrix_share']).astype(float),
+            'Fitshala Share': pd.Series(columns['fitshala_share']).astype(float),
+            'Is Currently Active': pd.Series(columns['member_is_active'], dtype=bool),
+            'Created At': pd.to_datetime(pd.Series(columns['created_at']), utc=True).dt.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+
+    def detailed_membership_values(self, memberships_qs):
+        """
+        Detailed report rows as tuples of DETAILED_SOURCE_FIELDS, with the
+        member's active flag read from its latest_end_date rollup rather
+        than a query per row
+        """
         
-        return pd.DataFrame(detailed_data)
+        today = timezone.now().date()
+        return memberships_qs.annotate(
+            member_is_active=Case(
+                When(member__latest_end_date__gte=today, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField()
+            )
+        ).order_by('start_date', 'id').values_list(*DETAILED_SOURCE_FIELDS)
 
     def save_excel_report(self, summary_df, detailed_df, options):
         """
         Save Excel file with formatting
         """
         
-        # Generate filename
-        if options['filename']:
-            filename = f"{options['filename']}.xlsx"
-        else:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f'mma_gym_report_{timestamp}.xlsx'
-        
-        # Full path
-        output_dir = options['output_dir']
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-            
-        filepath = os.path.join(output_dir, filename)
+        filepath = self.get_report_path(options)
         
         # Create Excel file
         with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
@@ -255,6 +377,307 @@ class Command(BaseCommand):
         
         return filepath
 
+    def save_excel_report_streaming(self, summary_df, start_date, end_date, options):
+        """
+        Save the Excel file through an openpyxl write-only workbook.
+
+        Detailed rows go straight from a database cursor to the sheet, so
+        memory stays bounded however many memberships there are. Write-only
+        sheets emit column widths before any row, so widths are sized up
+        front: from the small summary itself, and from one aggregate over
+        the detailed columns.
+        """
+        
+        filepath = self.get_report_path(options)
+        workbook = Workbook(write_only=True)
+        
+        summary_columns = list(summary_df.columns)
+        summary_rows = summary_df.itertuples(index=False, name=None)
+        summary_widths = [
+            max([len(column)] + [len(str(value)) for value in summary_df[column] if value])
+            for column in summary_columns
+        ]
+        self.write_streaming_sheet(workbook, 'Monthly Summary', summary_columns, summary_widths, summary_rows)
+        
+        memberships_qs = self.get_filtered_querysets(start_date, end_date, options['status'])[1]
+        self.write_streaming_sheet(
+            workbook,
+            'Detailed Memberships',
+            DETAILED_COLUMNS,
+            self.detailed_column_widths(memberships_qs),
+            self.iter_detailed_membership_rows(memberships_qs)
+        )
+        
+        workbook.save(filepath)
+        return filepath
+
+    def write_streaming_sheet(self, workbook, title, columns, widths, rows):
+        """
+        Append a header and rows to a new write-only sheet, using the same
+        width rule as format_excel_sheet
+        """
+        
+        sheet = workbook.create_sheet(title)
+        for index, width in enumerate(widths, start=1):
+            sheet.column_dimensions[get_column_letter(index)].width = min(width + 2, 50)
+        
+        sheet.append(columns)
+        for row in rows:
+            sheet.append(row)
+
+    def detailed_column_widths(self, memberships_qs):
+        """
+        Widest value per detailed column, from one aggregate query instead
+        of measuring every cell after writing
+        """
+        
+        lengths = memberships_qs.aggregate(
+            name=Max(Length('member__name')),
+            email=Max(Length('member__email')),
+            price=Max('price'),
+            combatrix=Max('combatrix_share'),
+            fitshala=Max('fitshala_share'),
+            duration=Max(F('end_date') - F('start_date')),
+        )
+        
+        def amount_width(value):
+            return len(str(float(value))) if value else 0
+        
+        duration = lengths['duration']
+        if isinstance(duration, timedelta):
+            duration = duration.days
+        
+        widest = {
+            'Member Name': lengths['name'] or 0,
+            'Member Email': lengths['email'] or 0,
+            'Member Status': max(len(label) for _, label in Member.STATUS_CHOICES),
+            'Member Join Date': 10,
+            'Membership Start': 10,
+            'Membership End': 10,
+            'Duration (Days)': len(str((duration or 0) + 1)),
+            'Month': len('September 2000'),
+            'Price': amount_width(lengths['price']),
+            'Combatrix Share': amount_width(lengths['combatrix']),
+            'Fitshala Share': amount_width(lengths['fitshala']),
+            'Is Currently Active': len('True'),
+            'Created At': 19,
+        }
+        return [max(len(column), widest[column]) for column in DETAILED_COLUMNS]
+
+    def iter_detailed_membership_rows(self, memberships_qs):
+        """
+        Yield detailed sheet rows straight off a server-side cursor
+        """
+        
+        status_labels = dict(Member.STATUS_CHOICES)
+        rows = self.detailed_membership_values(memberships_qs)
+        
+        for (name, email, status, date_joined, start, end, price, combatrix,
+             fitshala, is_active, created_at) in rows.iterator(chunk_size=2000):
+            yield [
+                name,
+                email,
+                status_labels.get(status, status),
+                date_joined.strftime('%Y-%m-%d'),
+                start.strftime('%Y-%m-%d'),
+                end.strftime('%Y-%m-%d'),
+                (end - start).days + 1,
+                start.strftime('%B %Y'),
+                float(price),
+                float(combatrix),
+                float(fitshala),
+                bool(is_active),
+                created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            ]
+
+    def save_partitioned_report(self, summary_df, start_date, end_date, options):
+        """
+        Write the report as a month-partitioned Parquet or CSV dataset:
+
+            <output-dir>/<filename>/monthly_summary.<ext>
+            <output-dir>/<filename>/memberships/month=YYYY-MM/part.<ext>
+
+        so the memberships directory reads back as one hive-partitioned
+        dataset (e.g. ``pd.read_parquet(path)``).
+
+        A fingerprint of each month's memberships is kept in _state.json.
+        With --incremental only months whose fingerprint changed are
+        rewritten, and months that no longer have memberships are removed.
+        """
+        
+        file_format = options['format']
+        if file_format == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise CommandError('Parquet output needs pyarrow: pip install pyarrow')
+        
+        dataset_dir = os.path.join(options['output_dir'], options['filename'] or 'mma_gym_report')
+        partitions_dir = os.path.join(dataset_dir, 'memberships')
+        os.makedirs(partitions_dir, exist_ok=True)
+        state_path = os.path.join(dataset_dir, '_state.json')
+        
+        # A previous run with other filters or another format can't be reused
+        run_key = {
+            'format': file_format,
+            'start_date': str(start_date or ''),
+            'end_date': str(end_date or ''),
+            'status': options['status'],
+        }
+        previous = {}
+        if options['incremental'] and os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+            if state.get('run') == run_key:
+                previous = state.get('partitions', {})
+        
+        memberships_qs = self.get_filtered_querysets(start_date, end_date, options['status'])[1]
+        fingerprints = self.month_fingerprints(memberships_qs, previous)
+        
+        rewritten = 0
+        for month, fingerprint in fingerprints.items():
+            old = previous.get(month)
+            if isinstance(old, dict) and all(old.get(key) == fingerprint[key] for key in ('memberships', 'members')):
+                continue
+            month_start = datetime.strptime(month, '%Y-%m').date()
+            month_df = self.partition_dataframe(memberships_qs.filter(
+                start_date__year=month_start.year,
+                start_date__month=month_start.month
+            ))
+            partition_dir = os.path.join(partitions_dir, f'month={month}')
+            os.makedirs(partition_dir, exist_ok=True)
+            self.write_frame(month_df, os.path.join(partition_dir, f'part.{file_format}'), file_format)
+            rewritten += 1
+        
+        removed = 0
+        for entry in os.listdir(partitions_dir):
+            if entry.startswith('month=') and entry[len('month='):] not in fingerprints:
+                shutil.rmtree(os.path.join(partitions_dir, entry))
+                removed += 1
+        
+        summary = summary_df[summary_df['Month'] != 'TOTAL'] if not summary_df.empty else summary_df
+        self.write_frame(summary, os.path.join(dataset_dir, f'monthly_summary.{file_format}'), file_format)
+        
+        with open(state_path, 'w') as f:
+            json.dump({'run': run_key, 'partitions': fingerprints}, f, indent=2)
+        
+        self.stdout.write(
+            f'Partitions rewritten: {rewritten}, unchanged: {len(fingerprints) - rewritten}, removed: {removed}'
+        )
+        return dataset_dir
+
+    def month_fingerprints(self, memberships_qs, previous):
+        """
+        Cheap per-month change detector from a single group-by query:
+        inserts and deletes move the count and id sum, and any edit to a
+        membership moves the latest ``updated_at``.
+
+        Member.updated_at also moves with every rollup refresh, so it only
+        says which months to look at again: the member columns written to
+        those months' partitions are digested, and the other months keep
+        the digest from ``previous``.
+        """
+        rows = memberships_qs.annotate(
+            month=TruncMonth('start_date')
+        ).values('month').annotate(
+            count=Count('id'),
+            id_sum=Sum('id'),
+            price=Sum('price'),
+            combatrix=Sum('combatrix_share'),
+            fitshala=Sum('fitshala_share'),
+            first_start=Min('start_date'),
+            last_start=Max('start_date'),
+            first_end=Min('end_date'),
+            last_end=Max('end_date'),
+            last_created=Max('created_at'),
+            last_updated=Max('updated_at'),
+            member_updated=Max('member__updated_at')
+        ).order_by('month')
+
+        fingerprints = {}
+        stale = []
+        for row in rows:
+            month = row.pop('month').strftime('%Y-%m')
+            member_updated = str(row.pop('member_updated'))
+            fingerprint = {'memberships': [str(value) for value in row.values()], 'member_updated': member_updated}
+            old = previous.get(month)
+            if isinstance(old, dict) and old.get('member_updated') == member_updated and 'members' in old:
+                fingerprint['members'] = old['members']
+            else:
+                stale.append(month)
+            fingerprints[month] = fingerprint
+        for month, digest in self.member_digests(memberships_qs, stale).items():
+            fingerprints[month]['members'] = digest
+        return fingerprints
+
+    def member_digests(self, memberships_qs, months):
+        """
+        Digest of the partition's member columns for each of ``months``
+        (YYYY-MM), streamed in partition row order
+        """
+        if not months:
+            return {}
+        in_months = Q()
+        for month in months:
+            first_day = datetime.strptime(month, '%Y-%m').date()
+            in_months |= Q(start_date__gte=first_day, start_date__lt=next_month(first_day))
+        rows = memberships_qs.filter(in_months).order_by('start_date', 'id').values_list(
+            'start_date', *PARTITION_MEMBER_FIELDS
+        )
+        digests = {}
+        for month, month_rows in groupby(rows.iterator(chunk_size=5000), key=lambda row: row[0].strftime('%Y-%m')):
+            digest = hashlib.md5()
+            for row in month_rows:
+                digest.update(repr(row[1:]).encode())
+            digests[month] = digest.hexdigest()
+        return digests
+
+    def partition_dataframe(self, memberships_qs):
+        """
+        Typed, analysis-friendly membership rows for one month partition
+        """
+        rows = list(memberships_qs.order_by('start_date', 'id').values_list(*PARTITION_SOURCE_FIELDS))
+        columns = dict(zip(PARTITION_COLUMNS, zip(*rows))) if rows else {name: [] for name in PARTITION_COLUMNS}
+
+        df = pd.DataFrame(columns, columns=PARTITION_COLUMNS)
+        for name in ['start_date', 'end_date', 'member_date_joined']:
+            df[name] = pd.to_datetime(df[name])
+        df['created_at'] = pd.to_datetime(df['created_at'], utc=True)
+        for name in ['price', 'combatrix_share', 'fitshala_share']:
+            df[name] = df[name].astype(float)
+        df['duration_days'] = (df['end_date'] - df['start_date']).dt.days + 1
+        return df
+
+    def write_frame(self, df, path, file_format):
+        """
+        Write a DataFrame atomically, so readers never see a half-written file
+        """
+        tmp_path = f'{path}.tmp'
+        if file_format == 'parquet':
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def get_report_path(self, options):
+        """
+        Build the output path, creating the output directory if needed
+        """
+        
+        # Generate filename
+        if options['filename']:
+            filename = f"{options['filename']}.xlsx"
+        else:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f'mma_gym_report_{timestamp}.xlsx'
+        
+        # Full path
+        output_dir = options['output_dir']
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+            
+        return os.path.join(output_dir, filename)
+
     def format_excel_sheet(self, sheet):
         """
         Format Excel sheet with auto-adjusted column widths
@@ -279,26 +702,18 @@ class Command(BaseCommand):
         Print summary statistics to console
         """
         
-        # Build querysets with filters
-        members_qs = Member.objects.all()
-        memberships_qs = Membership.objects.all()
-        
-        if status_filter != 'all':
-            members_qs = members_qs.filter(status=status_filter)
-            memberships_qs = memberships_qs.filter(member__status=status_filter)
-        
-        if start_date:
-            members_qs = members_qs.filter(date_joined__gte=start_date)
-            memberships_qs = memberships_qs.filter(start_date__gte=start_date)
-            
-        if end_date:
-            members_qs = members_qs.filter(date_joined__lte=end_date)
-            memberships_qs = memberships_qs.filter(start_date__lte=end_date)
+        members_qs, memberships_qs = self.get_filtered_querysets(start_date, end_date, status_filter)
         
         # Calculate totals
-        total_revenue = sum(float(m.price) for m in memberships_qs)
-        total_combatrix = sum(float(m.combatrix_share) for m in memberships_qs)
-        total_fitshala = sum(float(m.fitshala_share) for m in memberships_qs)
+        totals = memberships_qs.aggregate(
+            count=Count('id'),
+            revenue=Sum('price'),
+            combatrix=Sum('combatrix_share'),
+            fitshala=Sum('fitshala_share')
+        )
+        total_revenue = float(totals['revenue'] or 0)
+        total_combatrix = float(totals['combatrix'] or 0)
+        total_fitshala = float(totals['fitshala'] or 0)
         
         self.stdout.write(self.style.SUCCESS('\n=== SUMMARY STATISTICS ==='))
         
@@ -313,7 +728,7 @@ class Command(BaseCommand):
             status_info = ""
             
         self.stdout.write(f"Total Members{date_range}{status_info}: {members_qs.count()}")
-        self.stdout.write(f"Total Memberships{date_range}{status_info}: {memberships_qs.count()}")
+        self.stdout.write(f"Total Memberships{date_range}{status_info}: {totals['count']}")
         self.stdout.write(f"Total Revenue{date_range}{status_info}: Rs{total_revenue:.2f}")
         self.stdout.write(f"Total Combatrix Share{date_range}{status_info}: Rs{total_combatrix:.2f}")
         self.stdout.write(f"Total Fitshala Share{date_range}{status_info}: Rs{total_fitshala:.2f}")
\ No newline at end of file
@@ -0,0 +1,297 @@
+import csv
+import os
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.utils import timezone
+
+from combatrix.cache import invalidate_dashboard_stats
+from combatrix.models import Member, Membership, validate_membership
+
+
+MEMBER_COLUMNS = [
+    'name', 'email', 'phone_number',
+    'emergency_contact_name', 'emergency_contact_number', 'date_joined',
+]
+MEMBERSHIP_COLUMNS = ['start_date', 'end_date', 'price', 'combatrix_share', 'fitshala_share']
+REQUIRED_COLUMNS = ['name', 'email', 'phone_number']
+
+# Member fields overwritten when the email already exists
+UPSERT_FIELDS = ['name', 'phone_number', 'emergency_contact_name', 'emergency_contact_number', 'updated_at']
+
+# Rejected rows echoed to the console; --rejects gets all of them
+REJECTS_SHOWN = 20
+
+
+class RowError(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Import members and memberships from a CSV or XLSX file, upserting members by email'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            type=str,
+            help='CSV or XLSX file with one row per membership (or per member)',
+        )
+        parser.add_argument(
+            '--sheet',
+            type=str,
+            help='Worksheet to read from an XLSX file (default: the first sheet)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows written per bulk insert (default: 1000)',
+        )
+        parser.add_argument(
+            '--rejects',
+            type=str,
+            help='Write rejected rows and their reasons to this CSV file',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file without writing anything',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        if not os.path.exists(path):
+            raise CommandError(f'File not found: {path}')
+        if batch_size < 1:
+            raise CommandError('--batch-size must be a positive integer')
+
+        self.stdout.write(self.style.SUCCESS(f'Importing {path}...'))
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - No changes will be made'))
+
+        self.stats = {
+            'rows': 0,
+            'members': 0,
+            'memberships': 0,
+            'duplicates': 0,
+            'rejected': 0,
+        }
+        self.member_ids = set()
+
+        rejects_file = open(options['rejects'], 'w', newline='') if options['rejects'] else None
+        rejects_writer = None
+
+        try:
+            batch = []
+            for line_number, row in self.read_rows(path, options['sheet']):
+                self.stats['rows'] += 1
+                try:
+                    batch.append(self.clean_row(row))
+                except RowError as e:
+                    self.stats['rejected'] += 1
+                    if self.stats['rejected'] <= REJECTS_SHOWN:
+                        self.stdout.write(self.style.ERROR(f'Row {line_number} rejected: {e}'))
+                    if rejects_file:
+                        if rejects_writer is None:
+                            rejects_writer = csv.DictWriter(
+                                rejects_file,
+                                fieldnames=['row', 'reason'] + list(row.keys()),
+                                extrasaction='ignore'
+                            )
+                            rejects_writer.writeheader()
+                        rejects_writer.writerow({'row': line_number, 'reason': str(e), **row})
+                    continue
+
+                if len(batch) >= batch_size:
+                    self.write_batch(batch, dry_run)
+                    batch = []
+
+            if batch:
+                self.write_batch(batch, dry_run)
+        finally:
+            if rejects_file:
+                rejects_file.close()
+
+        if not dry_run and self.member_ids:
+            # Statuses are settled once for everyone touched by the import
+            with transaction.atomic():
+                Member.objects.filter(pk__in=self.member_ids).reconcile_status()
+                invalidate_dashboard_stats()
+
+        self.stdout.write(self.style.SUCCESS('\n=== IMPORT SUMMARY ==='))
+        self.stdout.write(f'Rows read: {self.stats["rows"]}')
+        self.stdout.write(f'Members created or updated: {self.stats["members"]}')
+        self.stdout.write(f'Memberships created: {self.stats["memberships"]}')
+        self.stdout.write(f'Duplicate memberships skipped: {self.stats["duplicates"]}')
+        self.stdout.write(f'Rows rejected: {self.stats["rejected"]}')
+        if self.stats['rejected'] > REJECTS_SHOWN and not options['rejects']:
+            self.stdout.write(self.style.WARNING('Use --rejects to save every rejected row with its reason'))
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('\nDRY RUN completed - No changes were made'))
+
+    def read_rows(self, path, sheet=None):
+        """Yield (line number, row dict) pairs without loading the whole file"""
+        extension = os.path.splitext(path)[1].lower()
+
+        if extension in ('.xlsx', '.xlsm'):
+            from openpyxl import load_workbook
+
+            workbook = load_workbook(path, read_only=True, data_only=True)
+            try:
+                worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+                rows = worksheet.iter_rows(values_only=True)
+                header = [self.normalize_header(cell) for cell in next(rows, ())]
+                self.check_header(header)
+                for line_number, values in enumerate(rows, start=2):
+                    if not any(value not in (None, '') for value in values):
+                        continue
+                    yield line_number, dict(zip(header, values))
+            finally:
+                workbook.close()
+
+        elif extension == '.csv':
+            with open(path, newline='', encoding='utf-8-sig') as f:
+                reader = csv.reader(f)
+                header = [self.normalize_header(cell) for cell in next(reader, [])]
+                self.check_header(header)
+                for values in reader:
+                    if not any(value.strip() for value in values):
+                        continue
+                    yield reader.line_num, dict(zip(header, values))
+
+        else:
+            raise CommandError(f'Unsupported file type "{extension}"; use .csv or .xlsx')
+
+    def normalize_header(self, value):
+        return str(value or '').strip().lower().replace(' ', '_')
+
+    def check_header(self, header):
+        missing = [column for column in REQUIRED_COLUMNS if column not in header]
+        if missing:
+            raise CommandError(f'Missing required columns: {", ".join(missing)}')
+
+    def clean_row(self, row):
+        """Validate one row into member and (optional) membership values"""
+        member = {}
+        for column in MEMBER_COLUMNS:
+            value = row.get(column)
+            if isinstance(value, str):
+                value = value.strip()
+            elif isinstance(value, float) and value.is_integer():
+                # Spreadsheets store phone numbers as numbers
+                value = int(value)
+            member[column] = value
+
+        for column in REQUIRED_COLUMNS:
+            if not member[column]:
+                raise RowError(f'{column} is required')
+        member['phone_number'] = str(member['phone_number'])
+        member['emergency_contact_name'] = str(member['emergency_contact_name'] or '')
+        member['emergency_contact_number'] = str(member['emergency_contact_number'] or '')
+
+        try:
+            validate_email(member['email'])
+        except ValidationError:
+            raise RowError(f'invalid email "{member["email"]}"')
+
+        for column, max_length in [('name', 100), ('phone_number', 15),
+                                   ('emergency_contact_name', 100), ('emergency_contact_number', 15)]:
+            if len(member[column]) > max_length:
+                raise RowError(f'{column} is longer than {max_length} characters')
+
+        member['date_joined'] = self.parse_date(member['date_joined'], 'date_joined') or timezone.now().date()
+
+        values = {column: row.get(column) for column in MEMBERSHIP_COLUMNS}
+        if all(value in (None, '') for value in values.values()):
+            return member, None
+
+        membership = {
+            'start_date': self.parse_date(values['start_date'], 'start_date', required=True),
+            'end_date': self.parse_date(values['end_date'], 'end_date', required=True),
+            'price': self.parse_amount(values['price'], 'price'),
+            'combatrix_share': self.parse_amount(values['combatrix_share'], 'combatrix_share'),
+            'fitshala_share': self.parse_amount(values['fitshala_share'], 'fitshala_share'),
+        }
+
+        # The rules MembershipForm and the bulk API apply
+        try:
+            validate_membership(membership)
+        except ValidationError as e:
+            raise RowError('; '.join(e.messages))
+
+        return member, membership
+
+    def parse_date(self, value, column, required=False):
+        if value in (None, ''):
+            if required:
+                raise RowError(f'{column} is required')
+            return None
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        try:
+            # fromisoformat is much cheaper than strptime on 100k+ rows
+            return date.fromisoformat(str(value).strip())
+        except ValueError:
+            raise RowError(f'{column} "{value}" is not a YYYY-MM-DD date')
+
+    def parse_amount(self, value, column):
+        if value in (None, ''):
+            raise RowError(f'{column} is required')
+        try:
+            amount = Decimal(str(value).strip()).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            raise RowError(f'{column} "{value}" is not a number')
+        if amount < 0 or amount >= Decimal('100000000'):
+            raise RowError(f'{column} {amount} is out of range')
+        return amount
+
+    def write_batch(self, batch, dry_run):
+        """Upsert the batch's members, then bulk insert its memberships"""
+        # Last row wins when an email repeats within the batch
+        members = {member['email']: member for member, _ in batch}
+        self.stats['members'] += len(members)
+        if dry_run:
+            self.stats['memberships'] += sum(1 for _, membership in batch if membership)
+            return
+
+        with transaction.atomic():
+            Member.objects.bulk_create(
+                [Member(**values) for values in members.values()],
+                update_conflicts=True,
+                unique_fields=['email'],
+                update_fields=UPSERT_FIELDS,
+            )
+            member_ids = dict(
+                Member.objects.filter(email__in=members.keys()).values_list('email', 'pk')
+            )
+            self.member_ids.update(member_ids.values())
+
+            existing = set(
+                Membership.objects.filter(member_id__in=member_ids.values())
+                .values_list('member_id', 'start_date', 'end_date')
+            )
+
+            memberships = []
+            for member, membership in batch:
+                if not membership:
+                    continue
+                key = (member_ids[member['email']], membership['start_date'], membership['end_date'])
+                if key in existing:
+                    self.stats['duplicates'] += 1
+                    continue
+                existing.add(key)
+                memberships.append(Membership(member_id=key[0], **membership))
+
+            # MembershipQuerySet.bulk_create refreshes the member rollups
+            Membership.objects.bulk_create(memberships)
+            self.stats['memberships'] += len(memberships)
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from combatrix.models import MONTHLY_REVENUE_FIELDS, Membership, MonthlyRevenue
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the MonthlyRevenue table from the Membership table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only',
+            action='store_true',
+            help='Only compare the stored months with the memberships, without writing',
+        )
+        parser.add_argument(
+            '--verbose',
+            action='store_true',
+            help='Show every month that does not match',
+        )
+
+    def handle(self, *args, **options):
+        verify_only = options['verify_only']
+        verbose = options['verbose']
+
+        if not verify_only:
+            self.stdout.write(self.style.SUCCESS('Rebuilding monthly revenue...'))
+            months = MonthlyRevenue.objects.rebuild()
+            self.stdout.write(f'Months written: {months}')
+            return
+
+        self.stdout.write(self.style.SUCCESS('Verifying monthly revenue...'))
+        stored = {
+            row['month']: row
+            for row in MonthlyRevenue.objects.values('month', *MONTHLY_REVENUE_FIELDS)
+        }
+        live = {
+            row['month']: row
+            for row in MonthlyRevenue.objects.membership_months(Membership.objects.all())
+        }
+
+        mismatched = 0
+        for month in sorted(stored.keys() | live.keys()):
+            if stored.get(month) != live.get(month):
+                mismatched += 1
+                if verbose:
+                    self.stdout.write(self.style.WARNING(
+                        f'Mismatch: {month:%Y-%m} stored={stored.get(month)} live={live.get(month)}'
+                    ))
+
+        self.stdout.write(f'Months checked: {len(stored.keys() | live.keys())}')
+        self.stdout.write(f'Mismatched months: {mismatched}')
+        if mismatched:
+            raise CommandError(f'{mismatched} months are stale; run without --verify-only to rebuild them')
@@ -0,0 +1,138 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from combatrix.models import OutboundMessage
+
+
+class Command(BaseCommand):
+    help = 'Send queued OutboundMessages, claiming them in batches so several workers can run side by side'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Messages claimed and sent over one mail connection (default: 50)',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=5,
+            help='Attempts before a message is marked failed (default: 5)',
+        )
+        parser.add_argument(
+            '--backoff',
+            type=float,
+            default=60,
+            help='Seconds before the first retry, doubled on each further attempt (default: 60)',
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=600,
+            help='Seconds after which a message left in "sending" is claimed again (default: 600)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5,
+            help='Seconds to wait when the queue is empty (default: 5)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty instead of polling for new messages',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be a positive integer')
+        if options['max_attempts'] < 1:
+            raise CommandError('--max-attempts must be a positive integer')
+
+        stale_after = timedelta(seconds=options['stale_after'])
+        self.stdout.write(self.style.SUCCESS('Mail worker started...'))
+
+        totals = {'sent': 0, 'retried': 0, 'failed': 0}
+        try:
+            while True:
+                messages = OutboundMessage.objects.claim(
+                    batch_size, stale_after=stale_after, max_attempts=options['max_attempts']
+                )
+                if not messages:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                for key, count in self.send_batch(messages, options).items():
+                    totals[key] += count
+                self.stdout.write(
+                    f'  sent {totals["sent"]}, retrying {totals["retried"]}, failed {totals["failed"]}'
+                )
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Interrupted'))
+
+        self.stdout.write(self.style.SUCCESS('\n=== MAIL WORKER SUMMARY ==='))
+        self.stdout.write(f'Sent: {totals["sent"]}')
+        self.stdout.write(f'Queued for retry: {totals["retried"]}')
+        self.stdout.write(f'Failed: {totals["failed"]}')
+
+    def send_batch(self, messages, options):
+        """Send claimed messages over one connection and record each outcome"""
+        sent = []
+        counts = {'sent': 0, 'retried': 0, 'failed': 0}
+        connection = None
+
+        for message in messages:
+            try:
+                if connection is None:
+                    connection = get_connection(fail_silently=False)
+                    connection.open()
+                connection.send_messages([
+                    EmailMessage(
+                        subject=message.subject,
+                        body=message.body,
+                        from_email=settings.DEFAULT_FROM_EMAIL,
+                        to=[message.to_email],
+                    )
+                ])
+            except Exception as e:
+                # Start the next message on a fresh connection
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+                    connection = None
+                counts['failed' if self.record_failure(message, e, options) else 'retried'] += 1
+            else:
+                sent.append(message.pk)
+
+        if connection is not None:
+            connection.close()
+
+        counts['sent'] = OutboundMessage.objects.filter(pk__in=sent).update(
+            status=OutboundMessage.STATUS_SENT,
+            sent_at=timezone.now(),
+            last_error='',
+        )
+        return counts
+
+    def record_failure(self, message, error, options):
+        """Requeue the message with backoff, or fail it for good; True if failed"""
+        message.last_error = str(error)
+        if message.attempts >= options['max_attempts']:
+            message.status = OutboundMessage.STATUS_FAILED
+        else:
+            message.status = OutboundMessage.STATUS_PENDING
+            message.available_at = timezone.now() + timedelta(
+                seconds=options['backoff'] * 2 ** (message.attempts - 1)
+            )
+        message.save(update_fields=['status', 'last_error', 'available_at'])
+        return message.status == OutboundMessage.STATUS_FAILED
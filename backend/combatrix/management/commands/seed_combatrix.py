@@ -0,0 +1,123 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count
+from combatrix.cache import invalidate_dashboard_stats
+from combatrix.models import Member, Membership, MonthlyRevenue, OutboundMessage
+from combatrix.seeding import SEED_EMAIL_DOMAIN, MembershipHistoryGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate realistic synthetic members and membership histories for load testing. '
+        f'Seeded members have @{SEED_EMAIL_DOMAIN} addresses, a reserved domain, so --clear never '
+        'touches real members. Rows are written with batched raw INSERTs, not bulk_create(), whose '
+        'per-object field preparation is the bottleneck at this volume. That skips model signals, '
+        'the querysets\' updated_at stamping and the per-row rollup refresh: the generator fills in '
+        'the rollups, status, phone_digits and updated_at itself, and MonthlyRevenue and the search '
+        'index are rebuilt once at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--members',
+            type=int,
+            default=10000,
+            help='Members to create; each has about 3 memberships on average (default: 10000)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed; the same seed and --as-of give the same data (default: 0)',
+        )
+        parser.add_argument(
+            '--as-of',
+            type=str,
+            help='Date (YYYY-MM-DD) the histories run up to (default: today)',
+        )
+        parser.add_argument(
+            '--years',
+            type=float,
+            default=3,
+            help='How far back members joined, in years (default: 3)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Members generated and inserted per batch (default: 5000)',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help=f'Delete previously seeded (@{SEED_EMAIL_DOMAIN}) members and their memberships first',
+        )
+
+    def handle(self, *args, **options):
+        if options['members'] < 0:
+            raise CommandError('--members cannot be negative')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive integer')
+        if options['years'] <= 0:
+            raise CommandError('--years must be positive')
+        as_of = None
+        if options['as_of']:
+            try:
+                as_of = date.fromisoformat(options['as_of'])
+            except ValueError:
+                raise CommandError(f'--as-of "{options["as_of"]}" is not a YYYY-MM-DD date')
+
+        seeded = Member.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}')
+        if options['clear']:
+            started = time.perf_counter()
+            deleted = self.clear(seeded)
+            self.stdout.write(f'Deleted {deleted} seeded members in {time.perf_counter() - started:.1f}s')
+
+        # Carry on numbering after the members seeded earlier, so emails stay unique
+        start = seeded.count()
+        generator = MembershipHistoryGenerator(
+            seed=options['seed'], as_of=as_of, years=options['years'], email_domain=SEED_EMAIL_DOMAIN
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'Seeding {options["members"]} members...'))
+        started = time.perf_counter()
+        try:
+            members, memberships = generator.create(start, start + options['members'], options['batch_size'])
+        except IntegrityError as e:
+            raise CommandError(f'Seeded rows clash with existing ones ({e}); run again with --clear')
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {members} members and {memberships} memberships in {elapsed:.1f}s '
+            f'({memberships / elapsed if elapsed else 0:,.0f} memberships/s)'
+        ))
+        for status, count in seeded.order_by().values_list('status').annotate(count=Count('id')):
+            self.stdout.write(f'  {status}: {count}')
+
+    def clear(self, seeded):
+        """
+        Delete the seeded rows with plain DELETEs. A cascading delete() would
+        load every membership to send its delete signals, which keep the
+        rollups current one row at a time; MonthlyRevenue is rebuilt instead.
+        """
+        quote = connection.ops.quote_name
+        seeded_pks, params = seeded.values('pk').query.sql_with_params()
+        with transaction.atomic(), connection.cursor() as cursor:
+            OutboundMessage.objects.filter(member__in=seeded).update(member=None)
+            cursor.execute(
+                f'DELETE FROM {quote(Membership._meta.db_table)} '
+                f'WHERE {quote(Membership._meta.get_field("member").column)} IN ({seeded_pks})',
+                params,
+            )
+            cursor.execute(
+                f'DELETE FROM {quote(Member._meta.db_table)} '
+                f'WHERE {quote(Member._meta.pk.column)} IN ({seeded_pks})',
+                params,
+            )
+            deleted = cursor.rowcount
+            MonthlyRevenue.objects.rebuild()
+            invalidate_dashboard_stats()
+        return deleted
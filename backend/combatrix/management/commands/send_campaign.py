@@ -0,0 +1,198 @@
+import os
+from datetime import date
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Context, TemplateDoesNotExist, engines
+from django.utils import timezone
+from combatrix.dashboard import EXPIRING_SOON_DAYS
+from combatrix.mailer import add_mailer_arguments, mailer_from_options
+from combatrix.models import Member, OutboundMessage
+
+
+SEGMENTS = ['active', 'expiring', 'lapsed', 'all']
+
+# Member columns loaded for each recipient and available to the template
+RECIPIENT_FIELDS = ['name', 'email', 'latest_end_date']
+
+
+class Command(BaseCommand):
+    help = 'Send a templated email campaign to a segment of members'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'template',
+            type=str,
+            help='Template name (e.g. campaigns/fee_update.txt) or path to a template file',
+        )
+        parser.add_argument(
+            '--subject',
+            type=str,
+            required=True,
+            help='Subject line; may use the same template variables as the body',
+        )
+        parser.add_argument(
+            '--segment',
+            choices=SEGMENTS,
+            default='active',
+            help='Members to mail (default: active)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=EXPIRING_SOON_DAYS,
+            help=f'Window for the expiring segment, in days (default: {EXPIRING_SOON_DAYS})',
+        )
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Start date (YYYY-MM-DD) for the lapsed segment',
+        )
+        parser.add_argument(
+            '--context',
+            action='append',
+            default=[],
+            metavar='KEY=VALUE',
+            help='Extra template variable; can be repeated',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Members fetched per database round trip (default: 2000)',
+        )
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Queue the emails for run_mail_worker instead of sending them now',
+        )
+        parser.add_argument(
+            '--campaign',
+            type=str,
+            help='Campaign name recorded on queued messages (default: the template name)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Print emails that would be sent without actually sending them',
+        )
+        add_mailer_arguments(parser)
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be a positive integer')
+
+        # Compile both templates once; only rendering happens per member
+        body_template = self.load_template(options['template'])
+        subject_template = self.engine.from_string(options['subject'])
+        extra_context = self.parse_context(options['context'])
+        members = self.get_segment(options)
+        today = timezone.now().date()
+
+        def messages():
+            recipients = members.only(*RECIPIENT_FIELDS).order_by('pk').iterator(
+                chunk_size=options['chunk_size']
+            )
+            for member in recipients:
+                context = Context(
+                    {'member': member, 'name': member.name, 'today': today, **extra_context},
+                    autoescape=False,
+                )
+                yield member, EmailMessage(
+                    # Header values can't contain newlines
+                    subject=' '.join(subject_template.render(context).split()),
+                    body=body_template.render(context),
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[member.email],
+                )
+
+        self.stdout.write(self.style.SUCCESS(f'Campaign "{options["template"]}" to {options["segment"]} members...'))
+
+        if options['dry_run']:
+            count = 0
+            for _, message in messages():
+                self.stdout.write(f"Would send email to: {message.to[0]}")
+                self.stdout.write(f"Subject: {message.subject}")
+                self.stdout.write(f"Message: {message.body}")
+                self.stdout.write("-" * 40)
+                count += 1
+            self.stdout.write(self.style.WARNING(f'DRY RUN completed - {count} emails rendered, none sent'))
+            return
+
+        if options['enqueue']:
+            campaign = options['campaign'] or options['template']
+            queued = self.enqueue(messages(), campaign[:100], options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f'Queued {queued} emails for run_mail_worker ({campaign})'))
+            return
+
+        result = mailer_from_options(options).send(message for _, message in messages())
+        self.stdout.write(self.style.SUCCESS(f'Process completed. Emails sent: {result.sent}'))
+        if result.skipped:
+            self.stdout.write(f'Skipped (already sent in a previous run): {result.skipped}')
+        if result.failed:
+            self.stdout.write(self.style.WARNING('Failed emails:'))
+            for email, error in result.failed:
+                self.stdout.write(f"  - {email}: {error}")
+
+    @property
+    def engine(self):
+        return engines['django'].engine
+
+    def load_template(self, name):
+        if os.path.isfile(name):
+            with open(name, encoding='utf-8') as f:
+                return self.engine.from_string(f.read())
+        try:
+            return self.engine.get_template(name)
+        except TemplateDoesNotExist:
+            raise CommandError(f'Template not found: {name}')
+
+    def parse_context(self, pairs):
+        context = {}
+        for pair in pairs:
+            key, sep, value = pair.partition('=')
+            if not sep or not key:
+                raise CommandError(f'--context expects KEY=VALUE, got "{pair}"')
+            context[key] = value
+        return context
+
+    def get_segment(self, options):
+        """The members a campaign goes to; deleted members are never mailed"""
+        segment = options['segment']
+        members = Member.objects.exclude(status=Member.STATUS_DELETED)
+
+        if segment == 'active':
+            return members.filter(status=Member.STATUS_ACTIVE)
+        if segment == 'expiring':
+            if options['days'] < 0:
+                raise CommandError('--days cannot be negative')
+            return members.expiring_within(options['days'])
+        if segment == 'lapsed':
+            if not options['since']:
+                raise CommandError('The lapsed segment needs --since YYYY-MM-DD')
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError(f'--since "{options["since"]}" is not a YYYY-MM-DD date')
+            return members.lapsed_since(since)
+        return members
+
+    def enqueue(self, messages, campaign, batch_size):
+        """Queue rendered messages with one bulk INSERT per batch"""
+        queued = 0
+        batch = []
+        for member, message in messages:
+            batch.append(OutboundMessage(
+                member=member,
+                to_email=message.to[0],
+                subject=message.subject[:255],
+                body=message.body,
+                campaign=campaign,
+            ))
+            if len(batch) >= batch_size:
+                queued += len(OutboundMessage.objects.enqueue(batch))
+                batch = []
+        if batch:
+            queued += len(OutboundMessage.objects.enqueue(batch))
+        return queued
@@ -1,6 +1,8 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Exists, Max, OuterRef, Q
 from django.utils import timezone
-from combatrix.models import Member
+from combatrix.models import Member, Membership
 
 
 class Command(BaseCommand):
@@ -17,145 +19,56 @@ class Command(BaseCommand):
             action='store_true',
             help='Show detailed output for each member',
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Number of member ids covered by each UPDATE statement (default: 5000)',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
         verbose = options['verbose']
-        
+        chunk_size = options['chunk_size']
+
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be a positive integer')
+
         self.stdout.write(
             self.style.SUCCESS('Starting member status update...')
         )
-        
+
         if dry_run:
             self.stdout.write(
                 self.style.WARNING('DRY RUN MODE - No changes will be made')
             )
-        
-        # Get all members
-        members = Member.objects.all()
-        total_members = members.count()
-        
-        # Counters
-        updated_to_inactive = 0
-        updated_to_active = 0
-        already_correct = 0
-        no_membership = 0
-        skipped_deleted = 0
-        
+
         today = timezone.now().date()
-        
-        for member in members:
-            # Skip deleted members
-            if member.status == Member.STATUS_DELETED:
-                skipped_deleted += 1
-                if verbose:
-                    self.stdout.write(
-                        self.style.WARNING(f'Skipped (deleted): {member.name}')
-                    )
-                continue
-            
-            # Get latest membership
-            latest_membership = member.memberships.order_by('-end_date').first()
-            
-            if not latest_membership:
-                no_membership += 1
-                if verbose:
-                    self.stdout.write(
-                        self.style.WARNING(f'No membership found: {member.name} (Current status: {member.status})')
-                    )
-                
-                # If member has no membership and status is active, mark as inactive
-                if member.status == Member.STATUS_ACTIVE:
-                    if not dry_run:
-                        member.status = Member.STATUS_INACTIVE
-                        member.save()
-                        updated_to_inactive += 1
-                        self.stdout.write(
-                            self.style.SUCCESS(f'Updated to INACTIVE: {member.name} (No membership)')
-                        )
-                    else:
-                        updated_to_inactive += 1
-                        self.stdout.write(
-                            self.style.SUCCESS(f'Would update to INACTIVE: {member.name} (No membership)')
-                        )
-                continue
-            
-            # Check if membership is expired
-            is_expired = latest_membership.end_date < today
-            
-            if verbose:
-                self.stdout.write(
-                    f'\nChecking: {member.name}'
-                )
-                self.stdout.write(
-                    f'  Current status: {member.status}'
-                )
-                self.stdout.write(
-                    f'  Latest membership end date: {latest_membership.end_date}'
-                )
-                self.stdout.write(
-                    f'  Is expired: {is_expired}'
-                )
-            
-            # Determine correct status
-            if is_expired:
-                correct_status = Member.STATUS_INACTIVE
-            else:
-                correct_status = Member.STATUS_ACTIVE
-            
-            # Update if needed
-            if member.status != correct_status:
-                if not dry_run:
-                    member.status = correct_status
-                    member.save()
-                    
-                    if correct_status == Member.STATUS_INACTIVE:
-                        updated_to_inactive += 1
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f'Updated to INACTIVE: {member.name} (Membership expired on {latest_membership.end_date})'
-                            )
-                        )
-                    else:
-                        updated_to_active += 1
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f'Updated to ACTIVE: {member.name} (Membership valid until {latest_membership.end_date})'
-                            )
-                        )
-                else:
-                    if correct_status == Member.STATUS_INACTIVE:
-                        updated_to_inactive += 1
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f'Would update to INACTIVE: {member.name} (Membership expired on {latest_membership.end_date})'
-                            )
-                        )
-                    else:
-                        updated_to_active += 1
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f'Would update to ACTIVE: {member.name} (Membership valid until {latest_membership.end_date})'
-                            )
-                        )
-            else:
-                already_correct += 1
-                if verbose:
-                    self.stdout.write(
-                        f'  Status already correct: {member.status}'
-                    )
-        
+
+        # The counts come from the same conditions the UPDATEs use, so a dry
+        # run reports exactly what a real run would change
+        counts = self.count_changes(today)
+
+        if verbose:
+            self.report_members(today, dry_run)
+
+        if not dry_run:
+            updated_to_active, updated_to_inactive = self.apply_changes(today, chunk_size)
+        else:
+            updated_to_active = counts['to_active']
+            updated_to_inactive = counts['to_inactive']
+
         # Print summary
         self.stdout.write(
             self.style.SUCCESS('\n=== UPDATE SUMMARY ===')
         )
-        self.stdout.write(f'Total members processed: {total_members}')
+        self.stdout.write(f'Total members processed: {counts["total"]}')
         self.stdout.write(f'Updated to INACTIVE: {updated_to_inactive}')
         self.stdout.write(f'Updated to ACTIVE: {updated_to_active}')
-        self.stdout.write(f'Already correct status: {already_correct}')
-        self.stdout.write(f'No membership found: {no_membership}')
-        self.stdout.write(f'Skipped (deleted): {skipped_deleted}')
-        
+        self.stdout.write(f'Already correct status: {counts["already_correct"]}')
+        self.stdout.write(f'No membership found: {counts["no_membership"]}')
+        self.stdout.write(f'Skipped (deleted): {counts["skipped_deleted"]}')
+
         if dry_run:
             self.stdout.write(
                 self.style.WARNING('\nDRY RUN completed - No changes were made')
@@ -164,3 +77,67 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.SUCCESS(f'\nStatus update completed! Updated {updated_to_inactive + updated_to_active} members.')
             )
+
+    def count_changes(self, today):
+        """Count every summary bucket with a single aggregate query"""
+        has_membership = Q(Exists(Membership.objects.filter(member=OuterRef('pk'))))
+        has_current_membership = Q(Exists(
+            Membership.objects.filter(member=OuterRef('pk'), end_date__gte=today)
+        ))
+        deleted = Q(status=Member.STATUS_DELETED)
+        to_active = Q(status=Member.STATUS_INACTIVE) & has_current_membership
+        to_inactive = Q(status=Member.STATUS_ACTIVE) & ~has_current_membership
+
+        return Member.objects.aggregate(
+            total=Count('id'),
+            skipped_deleted=Count('id', filter=deleted),
+            no_membership=Count('id', filter=~deleted & ~has_membership),
+            to_active=Count('id', filter=to_active),
+            to_inactive=Count('id', filter=to_inactive),
+            already_correct=Count('id', filter=~deleted & has_membership & ~to_active & ~to_inactive),
+        )
+
+    def apply_changes(self, today, chunk_size):
+        """Reconcile statuses with chunked set-based UPDATEs in one transaction"""
+        id_range = Member.objects.order_by('pk').values_list('pk', flat=True)
+        first_id = id_range.first()
+        last_id = id_range.last()
+
+        updated_to_active = 0
+        updated_to_inactive = 0
+        if first_id is None:
+            return updated_to_active, updated_to_inactive
+
+        with transaction.atomic():
+            for low in range(first_id, last_id + 1, chunk_size):
+                activated, deactivated = Member.objects.filter(
+                    pk__gte=low, pk__lt=low + chunk_size
+                ).reconcile_status(today)
+                updated_to_active += activated
+                updated_to_inactive += deactivated
+
+        return updated_to_active, updated_to_inactive
+
+    def report_members(self, today, dry_run):
+        """Per-member output for --verbose, streamed from the same conditions"""
+        prefix = 'Would update' if dry_run else 'Updated'
+        members = Member.objects.annotate(
+            current_end_date=Max('memberships__end_date')
+        ).order_by('pk')
+
+        for member in members.needing_deactivation(today).values('name', 'current_end_date').iterator():
+            if member['current_end_date'] is None:
+                reason = 'No membership'
+            else:
+                reason = f'Membership expired on {member["current_end_date"]}'
+            self.stdout.write(self.style.SUCCESS(f'{prefix} to INACTIVE: {member["name"]} ({reason})'))
+
+        for member in members.needing_activation(today).values('name', 'current_end_date').iterator():
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'{prefix} to ACTIVE: {member["name"]} (Membership valid until {member["current_end_date"]})'
+                )
+            )
+
+        for member in Member.objects.filter(status=Member.STATUS_DELETED).values('name').iterator():
+            self.stdout.write(self.style.WARNING(f'Skipped (deleted): {member["name"]}'))
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.19 on 2026-10-17 19:53
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_member_rollups(apps, schema_editor):
+    Member = apps.get_model('combatrix', 'Member')
+    Membership = apps.get_model('combatrix', 'Membership')
+    money = DecimalField(max_digits=12, decimal_places=2)
+    memberships = Membership.objects.filter(member=OuterRef('pk')).order_by().values('member')
+
+    def total(field):
+        return Coalesce(
+            Subquery(memberships.annotate(total=Sum(field)).values('total')),
+            Value(Decimal('0.00'), output_field=money),
+            output_field=money,
+        )
+
+    Member.objects.update(
+        latest_end_date=Subquery(memberships.annotate(latest=Max('end_date')).values('latest')),
+        lifetime_revenue=total('price'),
+        lifetime_combatrix_share=total('combatrix_share'),
+        lifetime_fitshala_share=total('fitshala_share'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('combatrix', '0002_member_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='latest_end_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='lifetime_combatrix_share',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='lifetime_fitshala_share',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='lifetime_revenue',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.RunPython(backfill_member_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.19 on 2026-10-17 19:54
+
+from django.db import migrations, models
+
+
+# SearchFilter's icontains compiles to UPPER(col::text) LIKE UPPER(...) on
+# PostgreSQL, so the trigram indexes are built on that same expression
+TRIGRAM_SEARCH_COLUMNS = ['name', 'email', 'phone_number']
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in TRIGRAM_SEARCH_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS member_{column}_trgm_idx ON combatrix_member '
+            f'USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in TRIGRAM_SEARCH_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS member_{column}_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('combatrix', '0003_member_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['status'], name='member_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['latest_end_date'], name='member_latest_end_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['member', '-end_date'], name='membership_member_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['start_date'], name='membership_start_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membership',
+            index=models.Index(fields=['end_date'], name='membership_end_date_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.19 on 2026-10-17 20:05
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def build_monthly_revenue(apps, schema_editor):
+    Membership = apps.get_model('combatrix', 'Membership')
+    MonthlyRevenue = apps.get_model('combatrix', 'MonthlyRevenue')
+    months = Membership.objects.annotate(
+        month=TruncMonth('start_date')
+    ).values('month').annotate(
+        revenue=Sum('price'),
+        combatrix_share=Sum('combatrix_share'),
+        fitshala_share=Sum('fitshala_share'),
+        membership_count=Count('id'),
+        member_count=Count('member', distinct=True),
+    ).order_by()
+    MonthlyRevenue.objects.bulk_create(MonthlyRevenue(**row) for row in months)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('combatrix', '0004_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month', unique=True)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('combatrix_share', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fitshala_share', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('membership_count', models.PositiveIntegerField(default=0)),
+                ('member_count', models.PositiveIntegerField(default=0, help_text='Distinct members with a membership starting this month')),
+            ],
+            options={
+                'ordering': ['month'],
+            },
+        ),
+        migrations.RunPython(build_monthly_revenue, migrations.RunPython.noop),
+    ]
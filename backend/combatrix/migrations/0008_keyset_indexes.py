@@ -0,0 +1,21 @@
+# Generated by Django 4.2.19 on 2026-10-17 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('combatrix', '0007_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['name', 'id'], name='member_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['date_joined', 'id'], name='member_date_joined_id_idx'),
+        ),
+    ]
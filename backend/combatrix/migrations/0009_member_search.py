@@ -0,0 +1,103 @@
+# Generated by Django 4.2.19 on 2026-10-17 20:22
+
+import re
+
+from django.db import migrations, models
+
+
+# Copies of the search setup as it stood when this migration was written
+# (combatrix.models.normalize_phone, combatrix.search), so later changes
+# to the app code don't change what the migration does
+BATCH_SIZE = 1000
+
+SEARCH_VECTOR_INDEX = 'member_search_vector_idx'
+
+FTS_TABLE = 'combatrix_member_fts'
+FTS_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON combatrix_member BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, name, email) VALUES (new.id, new.name, new.email);
+        END
+    """,
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON combatrix_member BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+        END
+    """,
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, email ON combatrix_member BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+            INSERT INTO {FTS_TABLE}(rowid, name, email) VALUES (new.id, new.name, new.email);
+        END
+    """,
+}
+
+
+def normalize_phone(value):
+    value = str(value or '').strip()
+    digits = re.sub(r'\D', '', value)
+    if (value.startswith('+') or len(digits) > 10) and digits.startswith('91'):
+        digits = digits[2:]
+    return digits.lstrip('0')
+
+
+def fill_phone_digits(apps, schema_editor):
+    Member = apps.get_model('combatrix', 'Member')
+    # Batches by pk rather than one cursor over the table being updated,
+    # which SQLite doesn't isolate from the writes
+    last_pk = 0
+    while True:
+        members = list(Member.objects.filter(pk__gt=last_pk).order_by('pk').only('phone_number')[:BATCH_SIZE])
+        if not members:
+            break
+        for member in members:
+            member.phone_digits = normalize_phone(member.phone_number)
+        Member.objects.bulk_update(members, ['phone_digits'])
+        last_pk = members[-1].pk
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+        schema_editor.add_index(
+            apps.get_model('combatrix', 'Member'),
+            GinIndex(SearchVector('name', 'email', config='simple'), name=SEARCH_VECTOR_INDEX),
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"name, email, content='combatrix_member', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        for sql in FTS_TRIGGERS.values():
+            schema_editor.execute(sql)
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {SEARCH_VECTOR_INDEX}')
+    elif vendor == 'sqlite':
+        for name in FTS_TRIGGERS:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('combatrix', '0008_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='phone_digits',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=15),
+        ),
+        migrations.RunPython(fill_phone_digits, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
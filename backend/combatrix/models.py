@@ -1,7 +1,203 @@
 # models.py
-from django.db import models
+import re
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import BooleanField, Case, Count, DecimalField, Exists, F, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncMonth
 from django.utils import timezone
 
+from .cache import invalidate_dashboard_stats
+
+
+MONEY_FIELD = DecimalField(max_digits=12, decimal_places=2)
+ZERO_MONEY = Value(Decimal('0.00'), output_field=MONEY_FIELD)
+
+# Denormalized membership totals stored on Member, maintained by the
+# Membership write path (see signals.py and MembershipQuerySet)
+ROLLUP_FIELDS = [
+    'latest_end_date',
+    'lifetime_revenue',
+    'lifetime_combatrix_share',
+    'lifetime_fitshala_share',
+]
+
+
+# Dialling code stripped from phone numbers before they are matched
+PHONE_COUNTRY_CODE = '91'
+
+
+def normalize_phone(value):
+    """
+    Digits of a phone number without the country code or trunk zero, so
+    "+91 98765-43210", "098765 43210" and "9876543210" are all stored and
+    searched as "9876543210". Also used on the partial numbers typed into
+    search, which is why the country code only goes when it is spelled out.
+    """
+    value = str(value or '').strip()
+    digits = re.sub(r'\D', '', value)
+    if (value.startswith('+') or len(digits) > 10) and digits.startswith(PHONE_COUNTRY_CODE):
+        digits = digits[len(PHONE_COUNTRY_CODE):]
+    return digits.lstrip('0')
+
+
+def validate_membership(data):
+    """
+    Rules shared by MembershipForm and MembershipBulkSerializer, checked on
+    their cleaned values: the dates in order and the shares adding up to
+    the price
+    """
+    start_date = data.get('start_date')
+    end_date = data.get('end_date')
+    price = data.get('price')
+    combatrix_share = data.get('combatrix_share')
+    fitshala_share = data.get('fitshala_share')
+
+    if start_date and end_date and start_date > end_date:
+        raise ValidationError("End date cannot be before start date")
+
+    if price and combatrix_share and fitshala_share:
+        if combatrix_share + fitshala_share != price:
+            raise ValidationError("Combatrix share and Fitshala share must sum up to the total price")
+
+
+def month_start(value):
+    return value.replace(day=1)
+
+
+def next_month(value):
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+class MemberQuerySet(models.QuerySet):
+    """
+    Set-based writes bypass ``auto_now`` and Member.save(), so update(),
+    bulk_create() and bulk_update() stamp ``updated_at`` and keep
+    ``phone_digits`` in step with ``phone_number`` themselves; every UPDATE
+    below goes through them.
+    """
+
+    def update(self, **kwargs):
+        kwargs.setdefault('updated_at', timezone.now())
+        if isinstance(kwargs.get('phone_number'), str):
+            kwargs.setdefault('phone_digits', normalize_phone(kwargs['phone_number']))
+        return super().update(**kwargs)
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.phone_digits = normalize_phone(obj.phone_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields and 'phone_number' in update_fields and 'phone_digits' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'phone_digits']
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = [*fields, 'updated_at']
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        if 'phone_number' in fields and 'phone_digits' not in fields:
+            for obj in objs:
+                obj.phone_digits = normalize_phone(obj.phone_number)
+            fields.append('phone_digits')
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def with_membership_summary(self):
+        """
+        Annotate each member with its latest end date, active flag and
+        lifetime revenue/share totals, all computed in a single query.
+        """
+        today = timezone.now().date()
+
+        return self.annotate(
+            summary_end_date=Max('memberships__end_date'),
+            summary_total_revenue=Coalesce(Sum('memberships__price'), ZERO_MONEY, output_field=MONEY_FIELD),
+            summary_combatrix_share=Coalesce(Sum('memberships__combatrix_share'), ZERO_MONEY, output_field=MONEY_FIELD),
+            summary_fitshala_share=Coalesce(Sum('memberships__fitshala_share'), ZERO_MONEY, output_field=MONEY_FIELD),
+        ).annotate(
+            summary_is_active=Case(
+                When(summary_end_date__gte=today, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            )
+        )
+
+    def _current_membership(self, today=None):
+        today = today or timezone.now().date()
+        return Exists(Membership.objects.filter(member=OuterRef('pk'), end_date__gte=today))
+
+    def needing_activation(self, today=None):
+        """Inactive members who hold a membership that hasn't ended"""
+        return self.filter(Q(status=self.model.STATUS_INACTIVE) & Q(self._current_membership(today)))
+
+    def needing_deactivation(self, today=None):
+        """Active members whose latest membership has ended, or who have none"""
+        return self.filter(Q(status=self.model.STATUS_ACTIVE) & ~Q(self._current_membership(today)))
+
+    def reconcile_status(self, today=None):
+        """
+        Apply the same rule as Member.auto_update_status() to the whole
+        queryset with two UPDATE statements. Deleted members are left alone.
+        Returns (activated, deactivated) row counts.
+        """
+        activated = self.needing_activation(today).update(status=self.model.STATUS_ACTIVE)
+        deactivated = self.needing_deactivation(today).update(status=self.model.STATUS_INACTIVE)
+        return activated, deactivated
+
+    def expiring_within(self, days, today=None):
+        """Members whose latest membership ends within the next ``days`` days"""
+        today = today or timezone.now().date()
+        return self.filter(latest_end_date__gte=today, latest_end_date__lte=today + timedelta(days=days))
+
+    def lapsed_since(self, since, today=None):
+        """Members whose latest membership ended between ``since`` and today"""
+        today = today or timezone.now().date()
+        return self.filter(latest_end_date__gte=since, latest_end_date__lt=today)
+
+    def refresh_rollups(self):
+        """
+        Recompute the rollup columns of every member in the queryset from
+        the Membership table with a single UPDATE. Returns the row count.
+        """
+        memberships = Membership.objects.filter(member=OuterRef('pk')).order_by().values('member')
+
+        def total(field):
+            return Coalesce(
+                Subquery(memberships.annotate(total=Sum(field)).values('total')),
+                ZERO_MONEY,
+                output_field=MONEY_FIELD,
+            )
+
+        return self.update(
+            latest_end_date=Subquery(memberships.annotate(latest=Max('end_date')).values('latest')),
+            lifetime_revenue=total('price'),
+            lifetime_combatrix_share=total('combatrix_share'),
+            lifetime_fitshala_share=total('fitshala_share'),
+        )
+
+    def apply_rollup_delta(self, revenue, combatrix_share, fitshala_share):
+        """
+        Shift the lifetime totals by the given amounts and re-read the
+        latest end date, without re-summing the member's memberships.
+        """
+        latest = Membership.objects.filter(
+            member=OuterRef('pk')
+        ).order_by('-end_date').values('end_date')[:1]
+
+        return self.update(
+            latest_end_date=Subquery(latest),
+            lifetime_revenue=F('lifetime_revenue') + revenue,
+            lifetime_combatrix_share=F('lifetime_combatrix_share') + combatrix_share,
+            lifetime_fitshala_share=F('lifetime_fitshala_share') + fitshala_share,
+        )
+
+
 class Member(models.Model):
     # Status choices
     STATUS_ACTIVE = 'active'
@@ -17,6 +213,9 @@ class Member(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
     phone_number = models.CharField(max_length=15)
+    # normalize_phone(phone_number), kept up to date on every write path so
+    # search can match number prefixes with an index range scan
+    phone_digits = models.CharField(max_length=15, blank=True, default='', editable=False, db_index=True)
     emergency_contact_name = models.CharField(max_length=100)
     emergency_contact_number = models.CharField(max_length=15)
     date_joined = models.DateField(default=timezone.now)
@@ -26,31 +225,69 @@ class Member(models.Model):
         default=STATUS_ACTIVE,
         help_text="Current status of the member"
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Membership rollups
+    latest_end_date = models.DateField(null=True, blank=True, editable=False)
+    lifetime_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    lifetime_combatrix_share = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    lifetime_fitshala_share = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+
+    objects = MemberQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status'], name='member_status_idx'),
+            models.Index(fields=['latest_end_date'], name='member_latest_end_date_idx'),
+            # Keyset pages over the sortable list columns
+            models.Index(fields=['name', 'id'], name='member_name_id_idx'),
+            models.Index(fields=['date_joined', 'id'], name='member_date_joined_id_idx'),
+        ]
     
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        # The rollup columns are owned by the membership write path. Leave
+        # them out of plain updates so a stale instance can't overwrite them.
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ROLLUP_FIELDS
+            ]
+        self.phone_digits = normalize_phone(self.phone_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone_number' in update_fields and 'phone_digits' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'phone_digits']
+        super().save(*args, **kwargs)
+    
     def is_active(self):
         """Check if member has an active membership"""
-        latest_membership = self.memberships.order_by('-end_date').first()
-        if latest_membership:
-            return latest_membership.end_date >= timezone.now().date()
+        if hasattr(self, 'summary_is_active'):
+            return self.summary_is_active
+        if self.latest_end_date:
+            return self.latest_end_date >= timezone.now().date()
         return False
     
     def membership_end_date(self):
-        latest_membership = self.memberships.order_by('-end_date').first()
-        if latest_membership:
-            return latest_membership.end_date
-        return None
+        if hasattr(self, 'summary_end_date'):
+            return self.summary_end_date
+        return self.latest_end_date
     
     def total_revenue(self):
-        return sum(membership.price for membership in self.memberships.all())
+        if hasattr(self, 'summary_total_revenue'):
+            return self.summary_total_revenue
+        return self.lifetime_revenue
     
     def combatrix_total_share(self):
-        return sum(membership.combatrix_share for membership in self.memberships.all())
+        if hasattr(self, 'summary_combatrix_share'):
+            return self.summary_combatrix_share
+        return self.lifetime_combatrix_share
     
     def fitshala_total_share(self):
-        return sum(membership.fitshala_share for membership in self.memberships.all())
+        if hasattr(self, 'summary_fitshala_share'):
+            return self.summary_fitshala_share
+        return self.lifetime_fitshala_share
     
     def auto_update_status(self):
         """Automatically update status based on membership"""
@@ -61,14 +298,102 @@ class Member(models.Model):
         if self.status in [self.STATUS_ACTIVE, self.STATUS_INACTIVE]:
             if is_member_active and self.status == self.STATUS_INACTIVE:
                 self.status = self.STATUS_ACTIVE
-                self.save()
+                self.save(update_fields=['status', 'updated_at'])
             elif not is_member_active and self.status == self.STATUS_ACTIVE:
                 self.status = self.STATUS_INACTIVE
-                self.save()
+                self.save(update_fields=['status', 'updated_at'])
         
         return self.status
 
 
+class MembershipQuerySet(models.QuerySet):
+    """
+    Bulk writes skip model signals, so these refresh the member rollups
+    of every affected member with one set-based UPDATE instead, recompute
+    the affected MonthlyRevenue rows and drop the cached dashboard snapshot.
+    They also stamp ``updated_at``, which auto_now only sets on save().
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            Member.objects.filter(pk__in={obj.member_id for obj in objs}).refresh_rollups()
+            MonthlyRevenue.objects.refresh_months(obj.start_date for obj in objs)
+            invalidate_dashboard_stats()
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        fields = [*fields, 'updated_at']
+        member_ids = {obj.member_id for obj in objs}
+        months = {obj.start_date for obj in objs}
+        if 'member' in fields or 'start_date' in fields:
+            for member_id, start_date in self.filter(pk__in=[obj.pk for obj in objs]).values_list(
+                'member_id', 'start_date'
+            ):
+                member_ids.add(member_id)
+                months.add(start_date)
+        with transaction.atomic(using=self.db, savepoint=False):
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            Member.objects.filter(pk__in=member_ids).refresh_rollups()
+            MonthlyRevenue.objects.refresh_months(months)
+            invalidate_dashboard_stats()
+        return rows
+
+    def update(self, **kwargs):
+        kwargs.setdefault('updated_at', timezone.now())
+        with transaction.atomic(using=self.db, savepoint=False):
+            affected = list(self.values_list('pk', 'member_id', 'start_date'))
+            member_ids = {member_id for _, member_id, _ in affected}
+            months = {start_date for _, _, start_date in affected}
+            rows = super().update(**kwargs)
+            if {'member', 'member_id', 'start_date'} & kwargs.keys():
+                # Re-read by pk: this queryset's own filter may no longer
+                # match rows moved to another member or month
+                for member_id, start_date in (
+                    self.model.objects.using(self.db)
+                    .filter(pk__in=[pk for pk, _, _ in affected])
+                    .values_list('member_id', 'start_date')
+                ):
+                    member_ids.add(member_id)
+                    months.add(start_date)
+            Member.objects.filter(pk__in=member_ids).refresh_rollups()
+            MonthlyRevenue.objects.refresh_months(months)
+            invalidate_dashboard_stats()
+        return rows
+
+    update.alters_data = True
+
+    def latest_per_member(self):
+        """
+        Only each member's latest membership: the one ending on the
+        member's ``latest_end_date`` rollup, the newest row on a tie.
+        Both lookups are served by membership_member_end_idx.
+        """
+        newer = self.model.objects.filter(
+            member=OuterRef('member'), end_date=OuterRef('end_date'), pk__gt=OuterRef('pk')
+        )
+        return self.filter(end_date=F('member__latest_end_date')).exclude(Exists(newer))
+
+    def expiring_within(self, days, today=None):
+        """
+        The latest membership of every member whose membership ends within
+        the next ``days`` days. Memberships already superseded by a renewal
+        are left out.
+        """
+        today = today or timezone.now().date()
+        until = today + timedelta(days=days)
+        return self.filter(
+            member__latest_end_date__gte=today,
+            member__latest_end_date__lte=until,
+            end_date__gte=today,
+            end_date__lte=until,
+        ).latest_per_member()
+
+
 class Membership(models.Model):
     member = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='memberships')
     start_date = models.DateField()
@@ -77,11 +402,261 @@ class Membership(models.Model):
     combatrix_share = models.DecimalField(max_digits=10, decimal_places=2)
     fitshala_share = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = MembershipQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Latest membership per member: order_by('-end_date').first()
+            models.Index(fields=['member', '-end_date'], name='membership_member_end_idx'),
+            models.Index(fields=['start_date'], name='membership_start_date_idx'),
+            models.Index(fields=['end_date'], name='membership_end_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.member.name}'s membership ({self.start_date} to {self.end_date})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored values so an update can shift the member
+        # rollups by the difference instead of re-summing everything
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
+        # The member rollups are updated from post_save; keep them in the
+        # same transaction as the membership row
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
         # Update member status when membership changes
-        self.member.auto_update_status()
\ No newline at end of file
+        self.member.auto_update_status()
+
+
+class MonthlyRevenueQuerySet(models.QuerySet):
+    def membership_months(self, memberships):
+        """Group ``memberships`` into rows shaped like this table"""
+        return memberships.annotate(
+            month=TruncMonth('start_date')
+        ).values('month').annotate(
+            revenue=Sum('price'),
+            combatrix_share=Sum('combatrix_share'),
+            fitshala_share=Sum('fitshala_share'),
+            membership_count=Count('id'),
+            member_count=Count('member', distinct=True),
+        ).order_by()
+
+    def refresh_months(self, dates):
+        """
+        Recompute the rows for the months containing ``dates`` from the
+        Membership table: one grouped aggregate, one upsert and one delete
+        for months that no longer have any memberships.
+
+        Writers to the same month are serialised on its row, locked before
+        aggregating, so under READ COMMITTED a concurrent transaction's
+        total can't be overwritten with one that missed its membership.
+        Missing months get an empty row first so there is always one to lock.
+        """
+        months = {month_start(value) for value in dates if value}
+        if not months:
+            return
+
+        in_months = Q()
+        for month in months:
+            in_months |= Q(start_date__gte=month, start_date__lt=next_month(month))
+
+        with transaction.atomic(using=self.db, savepoint=False):
+            self.bulk_create([self.model(month=month) for month in sorted(months)], ignore_conflicts=True)
+            # In month order, so two writers can't deadlock
+            list(self.select_for_update().filter(month__in=months).order_by('month').values_list('pk'))
+            rows = [
+                self.model(**row)
+                for row in self.membership_months(Membership.objects.filter(in_months))
+            ]
+            self.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['month'],
+                update_fields=MONTHLY_REVENUE_FIELDS,
+            )
+            self.filter(month__in=months - {row.month for row in rows}).delete()
+
+    def rebuild(self):
+        """Replace every row with a fresh aggregate of the Membership table"""
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            rows = self.bulk_create(
+                self.model(**row) for row in self.membership_months(Membership.objects.all())
+            )
+        return len(rows)
+
+    def breakdown(self, start_date=None, end_date=None):
+        """
+        Revenue per month for memberships starting between the two dates,
+        as dicts with month, revenue, combatrix, fitshala and count keys.
+        Months fully inside the range are read from this table; the partial
+        months at either edge are aggregated from the Membership table.
+        """
+        full_from = start_date if start_date is None or start_date.day == 1 else next_month(start_date)
+        if end_date is None:
+            full_until = None
+        elif next_month(end_date) - timedelta(days=1) == end_date:
+            full_until = next_month(end_date)
+        else:
+            full_until = month_start(end_date)
+
+        live = []
+        if full_from is not None and full_until is not None and full_from >= full_until:
+            # The range doesn't cover a single whole month
+            live.append(Q(start_date__gte=start_date, start_date__lte=end_date))
+            stored = self.none()
+        else:
+            stored = self.all()
+            if full_from is not None:
+                stored = stored.filter(month__gte=full_from)
+                if start_date < full_from:
+                    live.append(Q(start_date__gte=start_date, start_date__lt=full_from))
+            if full_until is not None:
+                stored = stored.filter(month__lt=full_until)
+                if end_date >= full_until:
+                    live.append(Q(start_date__gte=full_until, start_date__lte=end_date))
+
+        months = list(stored.values(*MONTHLY_REVENUE_KEYS))
+        for edge in live:
+            months.extend(self.membership_months(Membership.objects.filter(edge)).values(*MONTHLY_REVENUE_KEYS))
+
+        return [
+            {'month': row['month'], 'revenue': row['revenue'], 'combatrix': row['combatrix_share'],
+             'fitshala': row['fitshala_share'], 'count': row['membership_count']}
+            for row in sorted(months, key=lambda row: row['month'])
+        ]
+
+
+# Aggregated columns of MonthlyRevenue, recomputed together
+MONTHLY_REVENUE_FIELDS = ['revenue', 'combatrix_share', 'fitshala_share', 'membership_count', 'member_count']
+MONTHLY_REVENUE_KEYS = ['month'] + MONTHLY_REVENUE_FIELDS
+
+
+class MonthlyRevenue(models.Model):
+    """
+    Membership revenue per calendar month (by membership start date),
+    maintained by the Membership write path like the member rollups.
+    Rebuild it with the rebuild_monthly_revenue command.
+    """
+    month = models.DateField(unique=True, help_text="First day of the month")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    combatrix_share = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    fitshala_share = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    membership_count = models.PositiveIntegerField(default=0)
+    member_count = models.PositiveIntegerField(default=0, help_text="Distinct members with a membership starting this month")
+
+    objects = MonthlyRevenueQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['month']
+
+    def __str__(self):
+        return f"Revenue for {self.month:%B %Y}"
+
+
+
+class OutboundMessageQuerySet(models.QuerySet):
+    def enqueue(self, messages, batch_size=1000):
+        """
+        Queue OutboundMessage instances for the mail worker with bulk
+        INSERTs, ``batch_size`` rows per statement. Returns the messages.
+        """
+        return self.bulk_create(messages, batch_size=batch_size)
+
+    def claimable(self, now=None, stale_after=None, max_attempts=None):
+        """
+        Pending messages that are due, plus messages stuck in 'sending'
+        for longer than ``stale_after`` (their worker died mid-batch) that
+        have attempts left
+        """
+        now = now or timezone.now()
+        due = Q(status=self.model.STATUS_PENDING, available_at__lte=now)
+        if stale_after is not None:
+            stale = Q(status=self.model.STATUS_SENDING, locked_at__lt=now - stale_after)
+            if max_attempts is not None:
+                stale &= Q(attempts__lt=max_attempts)
+            due |= stale
+        return self.filter(due)
+
+    def claim(self, limit, stale_after=None, max_attempts=None):
+        """
+        Lock up to ``limit`` due messages with SELECT ... FOR UPDATE SKIP
+        LOCKED, mark them as sending and return them. Concurrent workers
+        never get the same row; SQLite has no row locks, so run a single
+        worker there.
+
+        Stale messages that already had ``max_attempts`` are failed here
+        instead: a message that kills its worker would otherwise be
+        claimed again forever, never reaching the worker's own check.
+        """
+        now = timezone.now()
+        with transaction.atomic(using=self.db):
+            if stale_after is not None and max_attempts is not None:
+                self.filter(
+                    status=self.model.STATUS_SENDING, locked_at__lt=now - stale_after, attempts__gte=max_attempts
+                ).update(
+                    status=self.model.STATUS_FAILED,
+                    last_error=f'Worker stopped while sending; gave up after {max_attempts} attempts',
+                )
+            messages = list(
+                self.claimable(now, stale_after, max_attempts)
+                .select_for_update(skip_locked=True)
+                .order_by('available_at', 'id')[:limit]
+            )
+            self.filter(pk__in=[message.pk for message in messages]).update(
+                status=self.model.STATUS_SENDING,
+                attempts=F('attempts') + 1,
+                locked_at=now,
+            )
+        for message in messages:
+            message.status = self.model.STATUS_SENDING
+            message.attempts += 1
+            message.locked_at = now
+        return messages
+
+
+class OutboundMessage(models.Model):
+    """An email waiting for, or already handled by, the run_mail_worker command"""
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    member = models.ForeignKey(
+        Member, on_delete=models.SET_NULL, null=True, blank=True, related_name='outbound_messages'
+    )
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    campaign = models.CharField(max_length=100, blank=True, help_text="Groups messages queued together")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Not sent before this time")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = OutboundMessageQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # The worker's claim query
+            models.Index(fields=['status', 'available_at'], name='outbound_status_available_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.to_email} ({self.status})"
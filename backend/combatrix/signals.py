@@ -0,0 +1,104 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_dashboard_stats
+from .models import ROLLUP_FIELDS, Member, Membership, MonthlyRevenue
+
+# Membership fields that feed the member rollup columns
+ROLLUP_SOURCE_FIELDS = ['member_id', 'end_date', 'price', 'combatrix_share', 'fitshala_share']
+
+# Membership fields that feed MonthlyRevenue
+MONTHLY_SOURCE_FIELDS = ['member_id', 'start_date', 'price', 'combatrix_share', 'fitshala_share']
+
+
+def _amounts(values, sign=1):
+    return (
+        sign * values['price'],
+        sign * values['combatrix_share'],
+        sign * values['fitshala_share'],
+    )
+
+
+def _is_member_cascade(origin):
+    return isinstance(origin, Member) or getattr(origin, 'model', None) is Member
+
+
+@receiver(post_save, sender=Membership)
+def update_member_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Shift the member rollups by the difference this save introduced and
+    recompute the affected MonthlyRevenue rows
+    """
+    current = {field: getattr(instance, field) for field in ROLLUP_SOURCE_FIELDS}
+    previous = getattr(instance, '_loaded_values', None)
+
+    if raw or (not created and (previous is None or not set(ROLLUP_SOURCE_FIELDS) <= previous.keys())):
+        # Fixture loads and instances we have no stored snapshot for
+        Member.objects.filter(pk=instance.member_id).refresh_rollups()
+    elif created:
+        Member.objects.filter(pk=instance.member_id).apply_rollup_delta(*_amounts(current))
+    elif previous['member_id'] != current['member_id']:
+        Member.objects.filter(pk=previous['member_id']).apply_rollup_delta(*_amounts(previous, -1))
+        Member.objects.filter(pk=instance.member_id).apply_rollup_delta(*_amounts(current))
+    elif any(previous[field] != current[field] for field in ROLLUP_SOURCE_FIELDS):
+        delta = [new - old for new, old in zip(_amounts(current), _amounts(previous))]
+        Member.objects.filter(pk=instance.member_id).apply_rollup_delta(*delta)
+
+    # The month the membership starts in, and the one it moved out of
+    if created or previous is None or any(
+        previous.get(field) != getattr(instance, field) for field in MONTHLY_SOURCE_FIELDS
+    ):
+        MonthlyRevenue.objects.refresh_months([instance.start_date, (previous or {}).get('start_date')])
+
+    instance._loaded_values = {**(previous or {}), **current, 'start_date': instance.start_date}
+
+    # Keep an already loaded member in step so auto_update_status() and
+    # callers reading the rollups don't see stale values
+    if Membership.member.is_cached(instance):
+        instance.member.refresh_from_db(fields=ROLLUP_FIELDS)
+
+
+@receiver(post_delete, sender=Membership)
+def update_member_rollups_on_delete(sender, instance, origin=None, **kwargs):
+    """Remove a deleted membership from its member's rollups"""
+    # Cascading from a member delete, the member row is about to go too
+    if _is_member_cascade(origin):
+        return
+    Member.objects.filter(pk=instance.member_id).apply_rollup_delta(
+        *_amounts({field: getattr(instance, field) for field in ROLLUP_SOURCE_FIELDS}, -1)
+    )
+
+
+@receiver(post_delete, sender=Membership)
+def update_monthly_revenue_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    Take a deleted membership out of its month. Cascading from a member
+    delete, the months are only collected on the delete's origin and
+    refreshed once, when the members themselves are deleted.
+    """
+    if _is_member_cascade(origin):
+        if not hasattr(origin, '_cascaded_revenue_months'):
+            origin._cascaded_revenue_months = set()
+        origin._cascaded_revenue_months.add(instance.start_date)
+        return
+    MonthlyRevenue.objects.refresh_months([instance.start_date])
+
+
+@receiver(post_delete, sender=Member)
+def refresh_cascaded_revenue_months(sender, instance, origin=None, **kwargs):
+    """
+    The Collector deletes memberships before their members, so by the first
+    member's post_delete every cascaded month has been collected
+    """
+    months = origin.__dict__.pop('_cascaded_revenue_months', None) if origin is not None else None
+    if months:
+        MonthlyRevenue.objects.refresh_months(months)
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+@receiver(post_save, sender=Membership)
+@receiver(post_delete, sender=Membership)
+def invalidate_cached_stats(sender, **kwargs):
+    """Any member or membership write can change the dashboard figures"""
+    invalidate_dashboard_stats()
@@ -0,0 +1,345 @@
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import count
+from unittest import mock
+
+from django.db import connection
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from .models import (
+    MONTHLY_REVENUE_KEYS, Member, Membership, MonthlyRevenue, MonthlyRevenueQuerySet, OutboundMessage
+)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'Checks SQLite query plans')
+class MembershipIndexPlanTests(TestCase):
+    """
+    The hot member and membership lookups are served by the indexes from
+    0004_access_path_indexes. Each test reads the plan with the index,
+    then drops it (inside the test's transaction, so it comes back) to
+    show the plan it replaced.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = Member.objects.create(
+            name='Plan Check', email='plan@example.com', phone_number='9876543210',
+            emergency_contact_name='Contact', emergency_contact_number='9876543211',
+        )
+
+    def setUp(self):
+        self.plans = count()
+
+    def plan(self, queryset):
+        # sqlite3 caches prepared statements, and a cached EXPLAIN isn't
+        # planned again after an index is dropped, so every plan is read
+        # with SQL of its own
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql} -- plan {next(self.plans)}', params)
+            return '\n'.join(row[-1] for row in cursor.fetchall())
+
+    def drop_index(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+
+    def test_latest_membership_uses_member_end_index(self):
+        latest = self.member.memberships.order_by('-end_date')[:1]
+        latest_per_member = Membership.objects.latest_per_member()
+
+        after = self.plan(latest)
+        self.assertIn('USING INDEX membership_member_end_idx', after)
+        self.assertNotIn('TEMP B-TREE', after)
+        self.assertIn('membership_member_end_idx', self.plan(latest_per_member))
+
+        self.drop_index('membership_member_end_idx')
+        self.assertIn('USE TEMP B-TREE FOR ORDER BY', self.plan(latest))
+        self.assertNotIn('membership_member_end_idx', self.plan(latest_per_member))
+
+    def test_expiring_memberships_use_end_date_index(self):
+        expiring = Membership.objects.expiring_within(30, today=date(2026, 1, 1))
+
+        self.assertIn('USING INDEX membership_end_date_idx (end_date>? AND end_date<?)', self.plan(expiring))
+
+        self.drop_index('membership_end_date_idx')
+        self.assertNotIn('membership_end_date_idx', self.plan(expiring))
+
+    def test_status_filter_uses_status_index(self):
+        active = Member.objects.filter(status='active')
+
+        self.assertIn('USING INDEX member_status_idx (status=?)', self.plan(active))
+
+        self.drop_index('member_status_idx')
+        self.assertNotIn('member_status_idx', self.plan(active))
+
+    def test_start_date_range_uses_start_date_index(self):
+        started = Membership.objects.filter(start_date__gte=date(2026, 1, 1), start_date__lte=date(2026, 1, 31))
+
+        self.assertIn('USING INDEX membership_start_date_idx (start_date>? AND start_date<?)', self.plan(started))
+
+        self.drop_index('membership_start_date_idx')
+        self.assertNotIn('membership_start_date_idx', self.plan(started))
+
+
+class MembershipFixtures:
+    """Members and memberships for the write path tests"""
+
+    def create_member(self, name='Test Member'):
+        index = Member.objects.count()
+        return Member.objects.create(
+            name=name, email=f'member{index}@example.com', phone_number=f'98765{index:05d}',
+            emergency_contact_name='Contact', emergency_contact_number='9876543211',
+        )
+
+    def membership(self, member, start_date, days=30, price='3000.00', save=True):
+        price = Decimal(price)
+        combatrix_share = (price * Decimal('0.70')).quantize(Decimal('0.01'))
+        membership = Membership(
+            member=member, start_date=start_date, end_date=start_date + timedelta(days=days),
+            price=price, combatrix_share=combatrix_share, fitshala_share=price - combatrix_share,
+        )
+        if save:
+            membership.save()
+        return membership
+
+
+class RollupWritePathTests(MembershipFixtures, TestCase):
+    """Member rollup columns stay equal to a fresh aggregate on every write path"""
+
+    def setUp(self):
+        self.alice = self.create_member('Alice')
+        self.bob = self.create_member('Bob')
+
+    def assertRollupsCurrent(self):
+        expected = {
+            member.pk: (
+                member.summary_end_date, member.summary_total_revenue,
+                member.summary_combatrix_share, member.summary_fitshala_share,
+            )
+            for member in Member.objects.with_membership_summary()
+        }
+        stored = {
+            member.pk: (
+                member.latest_end_date, member.lifetime_revenue,
+                member.lifetime_combatrix_share, member.lifetime_fitshala_share,
+            )
+            for member in Member.objects.all()
+        }
+        self.assertEqual(stored, expected)
+
+    def test_save(self):
+        membership = self.membership(self.alice, date(2026, 1, 10))
+        self.membership(self.alice, date(2026, 3, 1), days=90, price='8000.00')
+        self.assertRollupsCurrent()
+
+        membership.price = Decimal('4000.00')
+        membership.combatrix_share = Decimal('2800.00')
+        membership.fitshala_share = Decimal('1200.00')
+        membership.save()
+        self.assertRollupsCurrent()
+
+        membership.end_date = date(2026, 12, 31)
+        membership.save()
+        self.assertRollupsCurrent()
+
+        # Reassigned: both members change
+        membership.member = self.bob
+        membership.save()
+        self.assertRollupsCurrent()
+
+    def test_delete(self):
+        membership = self.membership(self.alice, date(2026, 1, 10))
+        self.membership(self.alice, date(2026, 2, 10))
+        self.membership(self.bob, date(2026, 2, 10))
+
+        membership.delete()
+        self.assertRollupsCurrent()
+        Membership.objects.filter(member=self.alice).delete()
+        self.assertRollupsCurrent()
+        self.assertIsNone(Member.objects.get(pk=self.alice.pk).latest_end_date)
+
+    def test_update(self):
+        self.membership(self.alice, date(2026, 1, 10))
+        self.membership(self.alice, date(2026, 2, 10))
+
+        Membership.objects.filter(start_date=date(2026, 1, 10)).update(
+            end_date=date(2026, 6, 30), price=Decimal('9000.00')
+        )
+        self.assertRollupsCurrent()
+        Membership.objects.filter(start_date=date(2026, 2, 10)).update(member=self.bob)
+        self.assertRollupsCurrent()
+
+    def test_bulk_paths(self):
+        memberships = Membership.objects.bulk_create([
+            self.membership(self.alice, date(2026, 1, 10), save=False),
+            self.membership(self.alice, date(2026, 2, 10), save=False),
+            self.membership(self.bob, date(2026, 1, 20), save=False),
+        ])
+        self.assertRollupsCurrent()
+
+        memberships[0].end_date = date(2026, 9, 1)
+        memberships[1].member = self.bob
+        memberships[2].price = Decimal('5000.00')
+        Membership.objects.bulk_update(memberships, ['end_date', 'member', 'price'])
+        self.assertRollupsCurrent()
+
+    def test_member_delete(self):
+        self.membership(self.alice, date(2026, 1, 10))
+        self.membership(self.bob, date(2026, 2, 10))
+        carol = self.create_member('Carol')
+        self.membership(carol, date(2026, 3, 10))
+
+        self.alice.delete()
+        self.assertRollupsCurrent()
+        Member.objects.filter(pk=self.bob.pk).delete()
+        self.assertRollupsCurrent()
+        self.assertEqual(Member.objects.get(pk=carol.pk).lifetime_revenue, Decimal('3000.00'))
+
+
+class MonthlyRevenueWritePathTests(MembershipFixtures, TestCase):
+    """MonthlyRevenue stays equal to a fresh aggregate on every write path"""
+
+    def setUp(self):
+        self.alice = self.create_member('Alice')
+        self.bob = self.create_member('Bob')
+
+    def assertMonthlyRevenueCurrent(self):
+        expected = {
+            row['month']: row
+            for row in MonthlyRevenue.objects.membership_months(Membership.objects.all()).values(*MONTHLY_REVENUE_KEYS)
+        }
+        stored = {row['month']: row for row in MonthlyRevenue.objects.values(*MONTHLY_REVENUE_KEYS)}
+        self.assertEqual(stored, expected)
+
+    def test_save(self):
+        membership = self.membership(self.alice, date(2026, 1, 10))
+        self.membership(self.bob, date(2026, 1, 20), price='8000.00')
+        self.assertMonthlyRevenueCurrent()
+
+        membership.price = Decimal('4000.00')
+        membership.combatrix_share = Decimal('2800.00')
+        membership.fitshala_share = Decimal('1200.00')
+        membership.save()
+        self.assertMonthlyRevenueCurrent()
+
+        # Moved to another month and member
+        membership.start_date = date(2026, 3, 1)
+        membership.member = self.bob
+        membership.save()
+        self.assertMonthlyRevenueCurrent()
+        self.assertFalse(MonthlyRevenue.objects.filter(month=date(2026, 2, 1)).exists())
+
+    def test_update(self):
+        self.membership(self.alice, date(2026, 1, 10))
+        self.membership(self.alice, date(2026, 2, 10))
+
+        Membership.objects.filter(start_date=date(2026, 1, 10)).update(start_date=date(2026, 4, 10))
+        self.assertMonthlyRevenueCurrent()
+        Membership.objects.filter(member=self.alice).update(member=self.bob, price=Decimal('100.00'))
+        self.assertMonthlyRevenueCurrent()
+
+    def test_delete(self):
+        membership = self.membership(self.alice, date(2026, 1, 10))
+        self.membership(self.bob, date(2026, 2, 10))
+
+        membership.delete()
+        self.assertMonthlyRevenueCurrent()
+        Membership.objects.filter(member=self.bob).delete()
+        self.assertMonthlyRevenueCurrent()
+        self.assertFalse(MonthlyRevenue.objects.exists())
+
+    def test_member_delete_refreshes_cascaded_months_once(self):
+        for month in range(1, 7):
+            self.membership(self.alice, date(2026, month, 5))
+            self.membership(self.bob, date(2026, month, 15))
+
+        refresh_months = MonthlyRevenueQuerySet.refresh_months
+        with mock.patch.object(
+            MonthlyRevenueQuerySet, 'refresh_months', autospec=True, side_effect=refresh_months
+        ) as refresh:
+            self.alice.delete()
+        self.assertEqual(refresh.call_count, 1)
+        self.assertMonthlyRevenueCurrent()
+
+        with mock.patch.object(
+            MonthlyRevenueQuerySet, 'refresh_months', autospec=True, side_effect=refresh_months
+        ) as refresh:
+            Member.objects.all().delete()
+        self.assertEqual(refresh.call_count, 1)
+        self.assertMonthlyRevenueCurrent()
+        self.assertFalse(MonthlyRevenue.objects.exists())
+
+    def test_bulk_paths(self):
+        memberships = Membership.objects.bulk_create([
+            self.membership(self.alice, date(2026, 1, 10), save=False),
+            self.membership(self.bob, date(2026, 1, 20), save=False),
+            self.membership(self.bob, date(2026, 2, 1), save=False),
+        ])
+        self.assertMonthlyRevenueCurrent()
+
+        memberships[0].start_date = date(2026, 5, 1)
+        memberships[1].price = Decimal('5000.00')
+        Membership.objects.bulk_update(memberships[:2], ['start_date', 'price'])
+        self.assertMonthlyRevenueCurrent()
+
+
+class OutboundMessageClaimTests(TestCase):
+    """Stale 'sending' rows are only reclaimed while they have attempts left"""
+
+    def message(self, attempts, **kwargs):
+        return OutboundMessage.objects.create(
+            to_email=f'to{attempts}@example.com', subject='Subject', body='Body', attempts=attempts, **kwargs
+        )
+
+    def test_stale_message_out_of_attempts_is_failed(self):
+        locked_at = timezone.now() - timedelta(hours=1)
+        retry = self.message(2, status=OutboundMessage.STATUS_SENDING, locked_at=locked_at)
+        exhausted = self.message(3, status=OutboundMessage.STATUS_SENDING, locked_at=locked_at)
+
+        claimed = OutboundMessage.objects.claim(10, stale_after=timedelta(minutes=15), max_attempts=3)
+
+        self.assertEqual([message.pk for message in claimed], [retry.pk])
+        exhausted.refresh_from_db()
+        self.assertEqual(exhausted.status, OutboundMessage.STATUS_FAILED)
+        self.assertEqual(exhausted.attempts, 3)
+        self.assertIn('gave up after 3 attempts', exhausted.last_error)
+        self.assertFalse(OutboundMessage.objects.claim(10, stale_after=timedelta(minutes=15), max_attempts=3))
+
+
+class ConditionalGetTests(MembershipFixtures, TestCase):
+    """Whole-second Last-Modified never hides a write made in the same second"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.member = self.create_member()
+        self.written = timezone.now().replace(microsecond=200000)
+
+    def get(self, now, **headers):
+        Member.objects.update(updated_at=self.written)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            return self.client.get('/api/members/', **headers)
+
+    def test_open_second_is_not_a_validator(self):
+        same_second = http_date(int(self.written.timestamp()))
+        response = self.get(self.written + timedelta(milliseconds=300), HTTP_IF_MODIFIED_SINCE=same_second)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+
+    def test_last_modified_rounds_up_once_the_second_has_passed(self):
+        response = self.get(self.written + timedelta(seconds=2))
+        last_modified = response['Last-Modified']
+        self.assertEqual(last_modified, http_date(int(self.written.timestamp()) + 1))
+
+        response = self.get(self.written + timedelta(seconds=3), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        self.written += timedelta(seconds=2, milliseconds=500)
+        response = self.get(self.written + timedelta(seconds=1), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
@@ -7,6 +7,7 @@ from django.contrib import admin
 router = DefaultRouter()
 router.register(r'members', views.MemberViewSet)
 router.register(r'memberships', views.MembershipViewSet)
+router.register(r'outbound-messages', views.OutboundMessageViewSet)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -1,15 +1,28 @@
-from rest_framework import viewsets, filters, status
+from rest_framework import mixins, viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 from django.db.models import Sum, Count
 from django.utils import timezone
-from datetime import timedelta
-from .models import Member, Membership
-from .serializers import MemberDetailSerializer, MemberListSerializer, MembershipSerializer
+from .conditional import ConditionalGetMixin
+from .dashboard import EXPIRING_SOON_DAYS, expiring_buckets, get_dashboard_stats, get_member_list_stats
+from .exports import EXPORT_FORMATS, membership_export_rows, stream_export
+from .forms import DateRangeForm, ExpiringForm, MemberSearchForm
+from .lean import (
+    MEMBER_LIST_FIELDS, MEMBERSHIP_FIELDS, member_list_rows, member_list_values, membership_rows,
+    membership_values, requested_fields
+)
+from .models import Member, Membership, MonthlyRevenue, OutboundMessage
+from .pagination import ExpiringMembershipPagination, MembershipCursorPagination, PaginationModeMixin
+from .search import DEFAULT_LIMIT, search_members
+from .serializers import (
+    MemberDetailSerializer, MemberListSerializer, MembershipBulkSerializer, MembershipSerializer,
+    OutboundMessageSerializer, SparseFieldsetMixin
+)
 
-class MemberViewSet(viewsets.ModelViewSet):
+class MemberViewSet(ConditionalGetMixin, PaginationModeMixin, viewsets.ModelViewSet):
     queryset = Member.objects.all()
     permission_classes = [IsAdminUser]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -17,38 +30,63 @@ class MemberViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'email', 'phone_number']
     ordering_fields = ['name', 'date_joined']
     
+    def get_queryset(self):
+        # Latest end date, active flag and revenue totals are read from the
+        # rollup columns on Member, so listing needs no membership join
+        queryset = Member.objects.order_by('id')
+        if self.request.method == 'GET' and self.action in ('list', 'retrieve'):
+            # Only the columns, joins and prefetches the (sparse) fields need
+            queryset = self.get_serializer().narrow_queryset(queryset)
+        return queryset
+    
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return MemberDetailSerializer
         return MemberListSerializer
     
+    def get_version_querysets(self):
+        if self.action == 'retrieve':
+            pk = self.kwargs[self.lookup_field]
+            if not str(pk).isdigit():
+                return []  # retrieve() answers 404
+            return [Member.objects.filter(pk=pk), Membership.objects.filter(member_id=pk)]
+        if self.action == 'dashboard_stats':
+            return [Member.objects.all(), Membership.objects.all()]
+        # List rows and statistics only read member columns and rollups,
+        # unless the memberships are expanded
+        if 'memberships' in SparseFieldsetMixin.requested(self.request, 'expand'):
+            return [Member.objects.all(), Membership.objects.all()]
+        return [Member.objects.all()]
+    
     def list(self, request, *args, **kwargs):
+        return self.conditional_get(request, lambda: self.build_list_response(request))
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_get(request, lambda: super(MemberViewSet, self).retrieve(request, *args, **kwargs))
+    
+    def build_list_response(self, request):
         # 1. Get the standard list response (filtered, searched, ordered, paginated)
         queryset = self.filter_queryset(self.get_queryset())
+        # Rows are built from values() unless nested fields are expanded
+        lean = not request.query_params.get('expand')
+        if lean:
+            queryset = member_list_values(queryset)
         page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
         
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            list_data = serializer.data
+        if lean:
+            list_data = member_list_rows(rows, requested_fields(request, MEMBER_LIST_FIELDS))
         else:
-            serializer = self.get_serializer(queryset, many=True)
-            list_data = serializer.data
+            list_data = self.get_serializer(rows, many=True).data
             
-        # 2. Calculate Global Statistics (Unfiltered)
-        total_members = Member.objects.count()
-        active_members = Member.objects.filter(
-            memberships__end_date__gte=timezone.now().date()
-        ).distinct().count()
+        # 2. Global Statistics (Unfiltered), cached until the next member or
+        # membership write; ``?statistics=false`` leaves them out
+        response_data = {}
+        if request.query_params.get('statistics', 'true').lower() not in ('false', '0', 'no'):
+            response_data['statistics'] = get_member_list_stats()
 
         # 3. Structure the Final Response
-        response_data = {
-            'statistics': {
-                'total_members': total_members,
-                'active_members': active_members,
-                'inactive_members': total_members - active_members,
-            },
-            'members': list_data
-        }
+        response_data['members'] = list_data
 
         # Handle pagination for the final response
         if page is not None:
@@ -58,52 +96,196 @@ class MemberViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def dashboard_stats(self, request):
-        """Get dashboard statistics"""
-        total_members = Member.objects.count()
-        active_members = sum(1 for m in Member.objects.all() if m.is_active())
+        """
+        Get dashboard statistics. ``?expiring_soon=false`` leaves out the
+        embedded list of expiring memberships; ``expiring_soon_count`` is
+        always there and /memberships/expiring/ pages the rows.
+        """
+        include_expiring = request.query_params.get('expiring_soon', 'true').lower() not in ('false', '0', 'no')
+        return self.conditional_get(request, lambda: Response(get_dashboard_stats(include_expiring)))
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Ranked typeahead search: ``?q=`` matches name and email words by
+        prefix, or a phone number prefix when it only has digits and
+        separators. ``?limit=`` (default 20, at most 100) and ``?status=``
+        narrow the results; ``?fields=`` works as on the list.
+        """
+        form = MemberSearchForm(request.query_params)
+        if not form.is_valid():
+            return Response(form.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        revenue_stats = Membership.objects.aggregate(
-            total_revenue=Sum('price'),
-            combatrix_revenue=Sum('combatrix_share'),
-            fitshala_revenue=Sum('fitshala_share')
+        pks = search_members(
+            form.cleaned_data['q'],
+            limit=form.cleaned_data['limit'] or DEFAULT_LIMIT,
+            status=form.cleaned_data['status'],
         )
-        
-        # Expiring soon
-        today = timezone.now().date()
-        fifteen_days_later = today + timedelta(days=15)
-        expiring_soon = Membership.objects.filter(
-            end_date__gte=today,
-            end_date__lte=fifteen_days_later
-        ).select_related('member')
-        print("expiring soon",  MembershipSerializer(expiring_soon, many=True).data)
-        
-        return Response({
-            'total_members': total_members,
-            'active_members': active_members,
-            'total_revenue': revenue_stats['total_revenue'] or 0,
-            'combatrix_revenue': revenue_stats['combatrix_revenue'] or 0,
-            'fitshala_revenue': revenue_stats['fitshala_revenue'] or 0,
-            'expiring_soon': MembershipSerializer(expiring_soon, many=True).data
-        })
-
-class MembershipViewSet(viewsets.ModelViewSet):
+        rows = {row['id']: row for row in member_list_values(Member.objects.filter(pk__in=pks))}
+        results = member_list_rows(
+            [rows[pk] for pk in pks if pk in rows],
+            requested_fields(request, MEMBER_LIST_FIELDS)
+        )
+        return Response({'query': form.cleaned_data['q'], 'results': results})
+
+class MembershipViewSet(ConditionalGetMixin, PaginationModeMixin, viewsets.ModelViewSet):
     queryset = Membership.objects.all()
     serializer_class = MembershipSerializer
     permission_classes = [IsAdminUser]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['member']
     ordering_fields = ['start_date', 'end_date']
+    bulk_create_limit = 1000
+    
+    def get_queryset(self):
+        queryset = Membership.objects.all()
+        if self.request.method == 'GET' and self.action in ('list', 'retrieve'):
+            # Only the columns, joins and prefetches the (sparse) fields need
+            queryset = self.get_serializer().narrow_queryset(queryset)
+        return queryset
+    
+    def get_version_querysets(self):
+        # Memberships are shown with their member's name
+        if self.action == 'retrieve':
+            pk = self.kwargs[self.lookup_field]
+            if not str(pk).isdigit():
+                return []  # retrieve() answers 404
+            return [Membership.objects.filter(pk=pk), Member.objects.filter(memberships=pk)]
+        return [Membership.objects.all(), Member.objects.all()]
+    
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('expand'):
+            return self.conditional_get(request, lambda: super(MembershipViewSet, self).list(request, *args, **kwargs))
+        return self.conditional_get(request, lambda: self.build_lean_list_response(request))
+    
+    def build_lean_list_response(self, request):
+        """The list response built from values() rows, same shape as the serializer's"""
+        fields = requested_fields(request, MEMBERSHIP_FIELDS)
+        queryset = membership_values(self.filter_queryset(self.get_queryset()), fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(membership_rows(page, fields))
+        return Response(membership_rows(queryset, fields))
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_get(
+            request, lambda: super(MembershipViewSet, self).retrieve(request, *args, **kwargs)
+        )
+    
+    @action(detail=False, methods=['get'])
+    def expiring(self, request):
+        """
+        Memberships ending within the next ``?days=`` days (default 15),
+        soonest first, one cursor page at a time. Only each member's latest
+        membership is listed, so renewed members don't show up. ``buckets``
+        counts them per day across the whole window.
+        """
+        form = ExpiringForm(request.query_params)
+        if not form.is_valid():
+            return Response(form.errors, status=status.HTTP_400_BAD_REQUEST)
+        days = form.cleaned_data['days']
+        if days is None:
+            days = EXPIRING_SOON_DAYS
+        
+        def build_response():
+            today = timezone.now().date()
+            buckets = expiring_buckets(days, today)
+            fields = requested_fields(request, MEMBERSHIP_FIELDS)
+            paginator = ExpiringMembershipPagination()
+            page = paginator.paginate_queryset(
+                membership_values(Membership.objects.expiring_within(days, today), fields), request
+            )
+            return Response({
+                'days': days,
+                'start_date': today,
+                'end_date': buckets[-1]['date'],
+                'total': sum(bucket['count'] for bucket in buckets),
+                'buckets': buckets,
+                'memberships': membership_rows(page, fields),
+                'memberships_next': paginator.get_next_link(),
+                'memberships_previous': paginator.get_previous_link(),
+            })
+        
+        return self.conditional_get(request, build_response)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        """
+        Create or renew many memberships in one request.
+
+        Accepts a list of memberships (or ``{"memberships": [...]}``),
+        validates all of them, inserts them with a single bulk INSERT and
+        recomputes status once for the affected members.
+        """
+        items = request.data.get('memberships') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'memberships': ['Expected a non-empty list of memberships.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.bulk_create_limit:
+            return Response(
+                {'memberships': [f'At most {self.bulk_create_limit} memberships per request.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        member_ids = set()
+        for item in items:
+            try:
+                member_ids.add(int(item.get('member')))
+            except (AttributeError, TypeError, ValueError):
+                pass  # reported per item by the serializer
+
+        context = self.get_serializer_context()
+        context['members'] = Member.objects.in_bulk(member_ids)
+        serializer = MembershipBulkSerializer(data=items, many=True, context=context)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            memberships = Membership.objects.bulk_create(
+                [Membership(**attrs) for attrs in serializer.validated_data]
+            )
+            # Membership.save() would do this once per row
+            Member.objects.filter(pk__in=member_ids).reconcile_status()
+
+        return Response(
+            MembershipSerializer(memberships, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
     
     @action(detail=False, methods=['post'])
     def revenue_analysis(self, request):
-        """Analyze revenue for a date range"""
-        start_date = request.data.get('start_date')
-        end_date = request.data.get('end_date')
+        """
+        Analyze revenue for a date range.
+
+        Memberships in the range are returned one cursor page at a time
+        (``?cursor=``/``?page_size=`` on the URL), or left out entirely with
+        ``include_memberships: false``. ``?export=ndjson|csv`` streams every
+        membership in the range instead of returning the analysis.
+        """
+        form = DateRangeForm(request.data)
+        if not form.is_valid():
+            return Response(form.errors, status=status.HTTP_400_BAD_REQUEST)
+        start_date = form.cleaned_data['start_date']
+        end_date = form.cleaned_data['end_date']
         
         memberships = Membership.objects.filter(
             start_date__gte=start_date,
             start_date__lte=end_date
         )
+
+        export_format = request.query_params.get('export') or request.data.get('export')
+        if export_format:
+            if export_format not in EXPORT_FORMATS:
+                return Response(
+                    {'export': [f"Choose one of: {', '.join(EXPORT_FORMATS)}"]},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return stream_export(
+                membership_export_rows(memberships),
+                export_format,
+                f'memberships_{start_date}_{end_date}'
+            )
         
         stats = memberships.aggregate(
             total_revenue=Sum('price'),
@@ -112,19 +294,71 @@ class MembershipViewSet(viewsets.ModelViewSet):
             member_count=Count('member', distinct=True)
         )
         
-        # Monthly breakdown
-        from django.db.models.functions import TruncMonth
-        monthly_data = memberships.annotate(
-            month=TruncMonth('start_date')
-        ).values('month').annotate(
-            revenue=Sum('price'),
-            combatrix=Sum('combatrix_share'),
-            fitshala=Sum('fitshala_share'),
-            count=Count('id')
-        ).order_by('month')
+        # Monthly breakdown, read from the MonthlyRevenue rollup
+        monthly_data = MonthlyRevenue.objects.breakdown(start_date, end_date)
         
-        return Response({
+        response_data = {
             'stats': stats,
-            'monthly_data': list(monthly_data),
-            'memberships': MembershipSerializer(memberships, many=True).data
-        })
\ No newline at end of file
+            'monthly_data': monthly_data,
+        }
+
+        if str(request.data.get('include_memberships', True)).lower() not in ('false', '0', 'no'):
+            paginator = MembershipCursorPagination()
+            page = paginator.paginate_queryset(membership_values(memberships), request)
+            response_data['memberships'] = membership_rows(page)
+            response_data['memberships_next'] = paginator.get_next_link()
+            response_data['memberships_previous'] = paginator.get_previous_link()
+
+        return Response(response_data)
+
+
+class OutboundMessageViewSet(mixins.CreateModelMixin,
+                             mixins.ListModelMixin,
+                             mixins.RetrieveModelMixin,
+                             viewsets.GenericViewSet):
+    """
+    Queue emails for the run_mail_worker command and follow their status.
+    POST a single message or a list of them; a list is queued with one
+    bulk INSERT.
+    """
+    queryset = OutboundMessage.objects.all()
+    serializer_class = OutboundMessageSerializer
+    permission_classes = [IsAdminUser]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['status', 'campaign', 'member']
+    ordering_fields = ['created_at', 'sent_at']
+    enqueue_limit = 1000
+
+    def get_queryset(self):
+        return OutboundMessage.objects.order_by('-id')
+
+    def create(self, request, *args, **kwargs):
+        many = isinstance(request.data, list)
+        items = request.data if many else [request.data]
+        if many and not items:
+            return Response(['Expected a non-empty list of messages.'], status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.enqueue_limit:
+            return Response(
+                [f'At most {self.enqueue_limit} messages per request.'],
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        member_ids = set()
+        for item in items:
+            try:
+                member_ids.add(int(item.get('member')))
+            except (AttributeError, TypeError, ValueError):
+                pass  # reported per item by the serializer
+
+        context = self.get_serializer_context()
+        context['members'] = Member.objects.in_bulk(member_ids)
+        serializer = self.get_serializer_class()(data=items, many=True, context=context)
+        if not serializer.is_valid():
+            errors = serializer.errors
+            return Response(errors if many else errors[0], status=status.HTTP_400_BAD_REQUEST)
+
+        messages = OutboundMessage.objects.enqueue(
+            [OutboundMessage(**attrs) for attrs in serializer.validated_data]
+        )
+        data = self.get_serializer_class()(messages, many=True).data
+        return Response(data if many else data[0], status=status.HTTP_201_CREATED)